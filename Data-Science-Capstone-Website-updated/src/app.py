@@ -2,8 +2,9 @@ import streamlit as st
 import pandas as pd
 from pages import pending_approval_page, show_approved, show_rejected, show_completed_projects # pending_completion_page
 from forms import proposal_request_form, completion_form, initialize_placeholder_data
-from data_management import initialize_session_state,show_to_edit_completion,show_to_edit_proposals,show_prof_proposals,show_all,fetch_data,fetch_proposals,fetch_pending_approval,fetch_approved_proposals,fetch_rejected_proposals,fetch_to_edit_proposals,fetch_prof_proposals,fetch_completions,fetch_pending_completions,fetch_approved_completions,check_action_and_prompt_password
+from data_management import ensure_schema,initialize_session_state,show_to_edit_completion,show_to_edit_proposals,show_prof_proposals,show_all,fetch_data,fetch_proposals,fetch_pending_approval,fetch_approved_proposals,fetch_rejected_proposals,fetch_to_edit_proposals,fetch_prof_proposals,fetch_completions,fetch_pending_completions,fetch_approved_completions,fetch_filter_options,fetch_filtered_page,fetch_paginated,check_action_and_prompt_password
 from utils import process_student_data
+from archive_jobs import start_workers
 import os
 from dotenv import load_dotenv
 import mysql.connector  
@@ -102,27 +103,27 @@ def display_sidebar():
     
 #     return proposals_df
 
-def filter_proposals(proposals_df):
+def filter_proposals(filter_options):
     """
     Collects filter options from the sidebar and returns the user-selected filters.
 
     Parameters:
-    - proposals_df (DataFrame): DataFrame containing the project proposals data.
+    - filter_options (dict): The values offered for each filter, as returned by `fetch_filter_options`.
 
     Returns:
-    - tuple: Contains lists of selected filters for project names, years, semesters, names, and prof specific proposal ID.
+    - dict: Lists of selected project names, years, semesters and names, and the specific proposal ID searched for.
+      The database applies them, see `data_management.build_filter_clause`.
     """
-    
-    if proposals_df.empty:
-        return [], [], [], [],'' # Return an empty DataFrame if there are no proposals
+
+    if not any(filter_options.values()):
+        return {} # No filters if there are no proposals
 
     # Sidebar filters
-    unique_semesters = proposals_df['semester'].unique().tolist()
-    unique_project_names = proposals_df['project_name'].unique().tolist()
-    unique_years = proposals_df['year'].unique().tolist()
-    unique_names = proposals_df['name'].unique().tolist()
-    # proposal_id = proposals_df['proposal_id'].tolist()
-    
+    unique_semesters = filter_options['semester']
+    unique_project_names = filter_options['project_name']
+    unique_years = filter_options['year']
+    unique_names = filter_options['name']
+
     selected_project_name = st.sidebar.multiselect("Filter by Project Name:",  unique_project_names)
     selected_year = st.sidebar.multiselect("Filter by Year:",  unique_years)
     selected_semester = st.sidebar.multiselect("Filter by Semester:", unique_semesters)
@@ -130,36 +131,13 @@ def filter_proposals(proposals_df):
     # selected_proposal_id = st.sidebar.selectbox("Filter by proposal id:", ['All'] + proposal_id)
     selected_proposal_id = st.sidebar.text_input("Enter Proposal ID to search:")
 
-    return selected_project_name,selected_year,selected_semester, selected_name,selected_proposal_id
-
-def apply_filters(proposals_df,selected_semester,selected_project_name,selected_year,selected_name,selected_proposal_id):
-    """
-    Applies user-selected filters to the DataFrame containing project proposals.
-
-    Parameters:
-    - proposals_df (DataFrame): The DataFrame to be filtered.
-    - selected_semester, selected_project_name, selected_year, selected_name (list): Filters selected by the user.
-    - selected_proposal_id (str): Specific proposal ID to filter by.
-
-    Returns:
-    - DataFrame: The filtered DataFrame based on the provided criteria.
-    """
-    if proposals_df.empty:
-        return proposals_df
-  
-    # Apply filters only if selections are made
-    if selected_semester:
-        proposals_df = proposals_df[proposals_df['semester'].isin(selected_semester)]
-    if selected_project_name:
-        proposals_df = proposals_df[proposals_df['project_name'].isin(selected_project_name)]
-    if selected_year:
-        proposals_df = proposals_df[proposals_df['year'].isin(selected_year)]
-    if selected_name:
-        proposals_df = proposals_df[proposals_df['name'].isin(selected_name)]
-    if selected_proposal_id:
-        proposals_df = proposals_df[proposals_df['proposal_id'] == selected_proposal_id]
-    
-    return proposals_df
+    return {
+        'project_name': selected_project_name,
+        'year': selected_year,
+        'semester': selected_semester,
+        'name': selected_name,
+        'proposal_id': selected_proposal_id
+    }
 
 
 def main():
@@ -175,57 +153,50 @@ def main():
     st.title("Data Science Capstone Website")
 
 
+    # Bring the database schema up to date, only does work on the first run of the process
+    ensure_schema()
+
+    # Start the background workers archiving the submitted repositories, only does work on the first run of the process
+    start_workers()
+
     # Initialize session state for app-wide variables
     initialize_session_state()
 
     # Display sidebar for navigation
     display_sidebar()
     
-    proposals_df = fetch_approved_proposals()
-    rejected_df = fetch_rejected_proposals()
-    to_edit_df = fetch_to_edit_proposals()
-    prof_proposal_df = fetch_prof_proposals()
-    completion_df = fetch_pending_completions()
-    approved_completion_df = fetch_approved_completions()
-    prop_df = fetch_pending_approval()
-    
+    # Filters are compiled into SQL and each page below
+    # only fetches the rows it displays
+    filters = filter_proposals(fetch_filter_options())
+
     # Default columns that can be added to the display
     default_columns = ["name", "project_name", "mentor", "semester", "year"]
     # additional columns that can be added to the display
     additional_columns = ["rationale","expected_students", "objective", "github_link", "dataset","timeline","approach","possible_issues","proposal_id","status"] 
 
-    full_df = pd.concat([proposals_df, rejected_df, to_edit_df, prof_proposal_df,completion_df,approved_completion_df,prop_df]) # ,edit_completion_df
-    
-    proj_name, year, sem, name,proposal_id= filter_proposals(full_df)
-    prof = apply_filters(prof_proposal_df,sem,proj_name, year, name,proposal_id)
-    proposal = apply_filters(prop_df,sem,proj_name, year, name,proposal_id)
-    edit_proposal = apply_filters(to_edit_df,sem,proj_name, year, name,proposal_id)
-    in_completion = apply_filters(completion_df,sem,proj_name, year, name,proposal_id)
-    # edit_completion = apply_filters(pd.DataFrame(st.session_state.edit_completion),sem,proj_name, year, name,proposal_id)
-    completed = apply_filters(approved_completion_df,sem,proj_name, year, name,proposal_id)
-    filtered_proposals1 = apply_filters(rejected_df,sem,proj_name, year, name,proposal_id)
-    filtered_proposals2 = apply_filters(proposals_df,sem,proj_name, year, name,proposal_id)
-    all_data = apply_filters(full_df,sem,proj_name, year, name,proposal_id)
-
     # Display content based on the active page
     if st.session_state.active_page == "Proposal Request":
 
         proposal_request_form()
     
     elif st.session_state.active_page == "Proposals by Professors":
-        
+        prof = fetch_paginated('prof', filters, key="prof")
+
         if prof.empty:
             st.write("No matching records found based on the filter criteria.")
         else:
             show_prof_proposals(prof)
 
     elif st.session_state.active_page == "Pending Approval":
+        proposal = fetch_paginated('pending_approval', filters, key="pending_approval")
 
         if proposal.empty:
             st.write("No matching records found based on the filter criteria.")
         else:
             pending_approval_page(proposal)
     elif st.session_state.active_page == "Edit Proposals":
+        # Not paginated, the page looks up a proposal ID among all of them
+        edit_proposal = fetch_filtered_page('to_edit', filters)
 
         show_to_edit_proposals(edit_proposal)
 
@@ -234,8 +205,9 @@ def main():
         selected_columns = st.multiselect("Select additional columns to display:", additional_columns)
         # Combine default columns with selected additional columns
         columns_to_display = default_columns + selected_columns
+        filtered_proposals1 = fetch_paginated('rejected', filters, key="rejected")
 
-        show_rejected(filtered_proposals1[columns_to_display])
+        show_rejected(filtered_proposals1[columns_to_display] if not filtered_proposals1.empty else filtered_proposals1)
 
     elif st.session_state.active_page == "Approved Projects":
         # Use prof multiselect widget to allow users to select additional columns to display
@@ -243,9 +215,10 @@ def main():
 
         # Combine default columns with selected additional columns
         columns_to_display = default_columns + selected_columns
-        # filtered_proposals = filter_proposals(proposals_df) 
+        filtered_proposals2 = fetch_paginated('approved', filters, key="approved")
+        # filtered_proposals = filter_proposals(proposals_df)
         # st.write(filtered_proposals)
-        show_approved(filtered_proposals2[columns_to_display]) 
+        show_approved(filtered_proposals2[columns_to_display] if not filtered_proposals2.empty else filtered_proposals2)
 
     elif st.session_state.active_page == "Project Completion Form":
         completion_form()
@@ -256,14 +229,17 @@ def main():
 
         # Combine default columns with selected additional columns
         columns_to_display = default_columns + selected_columns
-        show_completed_projects(completed[columns_to_display])
+        completed = fetch_paginated('completed', filters, key="completed")
+        show_completed_projects(completed[columns_to_display] if not completed.empty else completed)
         
     elif st.session_state.active_page == "All Projects":
         # selected_columns = st.multiselect("Select additional columns to display:", additional_columns)
         # columns_to_display = default_columns + selected_columns
-        show_all(filtered_proposals2,filtered_proposals1,edit_proposal,completed,proposal) # edit_completion
+        show_all(filters) # edit_completion
         # check_action_and_prompt_password()
         st.header("All Projects  - Downloadable in CSV format")
+        # Not paginated so that the CSV download covers every matching project, only the exported columns are read
+        all_data = fetch_filtered_page('all', filters, columns=["name", "project_name", "mentor", "semester", "year", "status","proposal_id"])
         if all_data.empty:
             st.write("No proposals to show")
         else:
@@ -0,0 +1,111 @@
+import gzip
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Compression of the repository archives: 'gzip', 'pgzip' (gzip compressed on several threads) or 'zstd'
+ARCHIVE_CODEC = os.getenv('ARCHIVE_CODEC', 'pgzip')
+# Compression level, the codec's default when unset
+ARCHIVE_COMPRESSION_LEVEL = int(os.getenv('ARCHIVE_COMPRESSION_LEVEL')) if os.getenv('ARCHIVE_COMPRESSION_LEVEL') else None
+# Threads used by the 'pgzip' and 'zstd' codecs for one archive
+ARCHIVE_COMPRESSION_THREADS = int(os.getenv('ARCHIVE_COMPRESSION_THREADS', os.cpu_count() or 1))
+
+
+class ParallelGzipWriter:
+    """
+    Writable stream compressing its input as gzip on a thread pool.
+
+    The input is cut into `block_size` blocks that are compressed concurrently (zlib releases the GIL) and
+    written in order as consecutive gzip members. The output is a regular multi-member gzip file that gzip,
+    tar and Python's gzip module read transparently. At most two blocks per thread are held in memory.
+    """
+
+    def __init__(self, fileobj, level=6, threads=None, block_size=1024 * 1024):
+        self.fileobj = fileobj
+        self.level = level
+        self.threads = threads or ARCHIVE_COMPRESSION_THREADS
+        self.block_size = block_size
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='pgzip')
+        self._pending = deque()
+        self._buffer = bytearray()
+
+    def _submit(self, block):
+        self._pending.append(self._executor.submit(gzip.compress, block, self.level, mtime=0))
+        while len(self._pending) > 2 * self.threads:
+            self.fileobj.write(self._pending.popleft().result())
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+        return len(data)
+
+    def close(self):
+        """Compresses the remaining input and writes every pending member. The underlying stream is left open."""
+        try:
+            if self._buffer or not self._pending:
+                self._submit(bytes(self._buffer))
+                self._buffer = bytearray()
+            while self._pending:
+                self.fileobj.write(self._pending.popleft().result())
+        finally:
+            self._executor.shutdown(wait=True)
+
+
+def open_gzip(fileobj, level, threads):
+    return gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=level, mtime=0)
+
+
+def open_pgzip(fileobj, level, threads):
+    return ParallelGzipWriter(fileobj, level=level, threads=threads)
+
+
+def open_zstd(fileobj, level, threads):
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("The zstd archive codec needs the zstandard package.")
+    return zstandard.ZstdCompressor(level=level, threads=threads).stream_writer(fileobj, closefd=False)
+
+
+# name: (archive file extension, default level, factory returning a writable stream compressing into `fileobj`)
+CODECS = {
+    'gzip': ('tar.gz', 6, open_gzip),
+    'pgzip': ('tar.gz', 6, open_pgzip),
+    'zstd': ('tar.zst', 3, open_zstd),
+}
+
+
+def get_codec(name=None):
+    """Returns the (extension, default level, factory) entry of a codec, `ARCHIVE_CODEC` by default."""
+    name = name or ARCHIVE_CODEC
+    if name not in CODECS:
+        raise ValueError(f"Unknown archive codec {name!r}, expected one of {', '.join(CODECS)}")
+    return CODECS[name]
+
+
+def archive_extension(name=None):
+    """Returns the file extension of the archives written by a codec, e.g. 'tar.gz'."""
+    return get_codec(name)[0]
+
+
+def open_compressor(fileobj, name=None, level=None, threads=None):
+    """
+    Opens a writable stream compressing into `fileobj`. Closing it flushes the compressed data but leaves
+    `fileobj` open.
+
+    Parameters:
+    - fileobj (file object): The binary stream receiving the compressed data.
+    - name (str): The codec, `ARCHIVE_CODEC` by default.
+    - level (int): The compression level, `ARCHIVE_COMPRESSION_LEVEL` or the codec's default.
+    - threads (int): Compression threads for 'pgzip' and 'zstd', `ARCHIVE_COMPRESSION_THREADS` by default.
+
+    Returns:
+    - file object: The compressing stream.
+    """
+    _, default_level, factory = get_codec(name)
+    if level is None:
+        level = ARCHIVE_COMPRESSION_LEVEL if ARCHIVE_COMPRESSION_LEVEL is not None else default_level
+    return factory(fileobj, level, threads or ARCHIVE_COMPRESSION_THREADS)
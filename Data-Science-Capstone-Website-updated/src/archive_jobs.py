@@ -0,0 +1,311 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from dotenv import load_dotenv
+from utils import process_student_data
+
+
+load_dotenv() # take environment variables from .env.
+
+# SQLite file holding the queue. It must be on a disk shared by the app and the workers, and it survives
+# restarts so that queued jobs are not lost when the server is redeployed.
+ARCHIVE_JOBS_DB = os.getenv('ARCHIVE_JOBS_DB', os.path.join('.', 'archive_jobs.sqlite3'))
+# Number of worker threads started by the Streamlit server process, 0 to only run them with `python archive_jobs.py`
+ARCHIVE_WORKERS = int(os.getenv('ARCHIVE_WORKERS', 2))
+ARCHIVE_JOB_MAX_ATTEMPTS = int(os.getenv('ARCHIVE_JOB_MAX_ATTEMPTS', 3))
+# Seconds before the first retry of a failed job, doubled for every further attempt
+ARCHIVE_JOB_RETRY_DELAY = float(os.getenv('ARCHIVE_JOB_RETRY_DELAY', 30))
+# A running job whose worker has not renewed its lease for this many seconds is assumed to belong to a worker
+# that died and is queued again
+ARCHIVE_JOB_LEASE_SECONDS = float(os.getenv('ARCHIVE_JOB_LEASE_SECONDS', 300))
+# Seconds between two renewals of the lease of a running job, well below ARCHIVE_JOB_LEASE_SECONDS
+ARCHIVE_JOB_HEARTBEAT_SECONDS = float(os.getenv('ARCHIVE_JOB_HEARTBEAT_SECONDS', 60))
+# Seconds an idle worker waits before looking for new jobs
+ARCHIVE_JOB_POLL_INTERVAL = float(os.getenv('ARCHIVE_JOB_POLL_INTERVAL', 2))
+
+JOBS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS archive_jobs (
+    job_id TEXT PRIMARY KEY,
+    proposal_id TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL
+)
+"""
+
+
+def connect():
+    """Opens the queue database, creating the jobs table if needed. Transactions are started explicitly."""
+    connection = sqlite3.connect(ARCHIVE_JOBS_DB, timeout=30, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    connection.execute(JOBS_TABLE_DDL)
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_archive_jobs_status ON archive_jobs (status, next_attempt_at)")
+    return connection
+
+
+def job_to_dict(row):
+    """Converts a jobs table row to a dict with its payload and result decoded."""
+    if row is None:
+        return None
+    job = dict(row)
+    job['payload'] = json.loads(job['payload'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+
+def enqueue_job(payload, proposal_id=None, max_attempts=None):
+    """
+    Queues an archive job.
+
+    Parameters:
+    - payload (dict): The student data passed to `process_student_data`.
+    - proposal_id (str): The proposal the archive belongs to, used to look the job up from the pages.
+    - max_attempts (int): How many times the job is tried before it is marked failed.
+
+    Returns:
+    - str: The ID of the new job.
+    """
+    job_id = str(uuid.uuid4())
+    now = time.time()
+    connection = connect()
+    try:
+        connection.execute(
+            "INSERT INTO archive_jobs (job_id, proposal_id, payload, status, max_attempts, created_at, updated_at, next_attempt_at) "
+            "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, proposal_id, json.dumps(payload), max_attempts or ARCHIVE_JOB_MAX_ATTEMPTS, now, now, now)
+        )
+    finally:
+        connection.close()
+    return job_id
+
+
+def get_job(job_id):
+    """Returns the job with the given ID as a dict, or None if it does not exist."""
+    connection = connect()
+    try:
+        return job_to_dict(connection.execute("SELECT * FROM archive_jobs WHERE job_id = ?", (job_id,)).fetchone())
+    finally:
+        connection.close()
+
+
+def latest_job_for_proposal(proposal_id):
+    """Returns the most recently queued job of a proposal, or None."""
+    connection = connect()
+    try:
+        row = connection.execute(
+            "SELECT * FROM archive_jobs WHERE proposal_id = ? ORDER BY created_at DESC LIMIT 1", (proposal_id,)
+        ).fetchone()
+        return job_to_dict(row)
+    finally:
+        connection.close()
+
+
+def claim_job():
+    """
+    Atomically moves the oldest due job from queued to running.
+
+    Returns:
+    - dict: The claimed job, or None if no job is due.
+    """
+    now = time.time()
+    connection = connect()
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute(
+            "SELECT * FROM archive_jobs WHERE status = 'queued' AND next_attempt_at <= ? ORDER BY created_at LIMIT 1", (now,)
+        ).fetchone()
+        if row is None:
+            connection.execute("COMMIT")
+            return None
+        connection.execute(
+            "UPDATE archive_jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+            (now, row['job_id'])
+        )
+        connection.execute("COMMIT")
+        job = job_to_dict(row)
+        job['status'] = 'running'
+        job['attempts'] += 1
+        return job
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.close()
+
+
+def complete_job(job_id, result):
+    """Marks a job done and stores what the handler returned."""
+    connection = connect()
+    try:
+        connection.execute(
+            "UPDATE archive_jobs SET status = 'done', error = NULL, result = ?, updated_at = ? WHERE job_id = ?",
+            (json.dumps(result), time.time(), job_id)
+        )
+    finally:
+        connection.close()
+
+
+def fail_job(job, error, retry=True):
+    """
+    Queues a failed job again with exponential backoff, or marks it failed once it is out of attempts or when
+    `retry` is False.
+    """
+    now = time.time()
+    connection = connect()
+    try:
+        if retry and job['attempts'] < job['max_attempts']:
+            delay = ARCHIVE_JOB_RETRY_DELAY * 2 ** (job['attempts'] - 1)
+            connection.execute(
+                "UPDATE archive_jobs SET status = 'queued', error = ?, updated_at = ?, next_attempt_at = ? WHERE job_id = ?",
+                (error, now, now + delay, job['job_id'])
+            )
+        else:
+            connection.execute(
+                "UPDATE archive_jobs SET status = 'failed', error = ?, updated_at = ? WHERE job_id = ?",
+                (error, now, job['job_id'])
+            )
+    finally:
+        connection.close()
+
+
+def renew_lease(job):
+    """
+    Refreshes the updated_at of a running job so that `requeue_stale_jobs` leaves it to its worker.
+
+    Returns:
+    - bool: False if the job is no longer this worker's, e.g. because its lease expired and it was queued again.
+    """
+    connection = connect()
+    try:
+        cursor = connection.execute(
+            "UPDATE archive_jobs SET updated_at = ? WHERE job_id = ? AND status = 'running' AND attempts = ?",
+            (time.time(), job['job_id'], job['attempts'])
+        )
+        return cursor.rowcount == 1
+    finally:
+        connection.close()
+
+
+def heartbeat(job, stop_event):
+    """Renews the lease of a job every `ARCHIVE_JOB_HEARTBEAT_SECONDS` until `stop_event` is set."""
+    while not stop_event.wait(ARCHIVE_JOB_HEARTBEAT_SECONDS):
+        try:
+            if not renew_lease(job):
+                print(f"Archive job {job['job_id']} lost its lease")
+                return
+        except Exception as e:
+            print(f"Error renewing the lease of archive job {job['job_id']}: {e}")
+
+
+def requeue_stale_jobs():
+    """Queues again the running jobs whose lease expired because their worker was stopped mid-job."""
+    now = time.time()
+    connection = connect()
+    try:
+        cursor = connection.execute(
+            "UPDATE archive_jobs SET status = 'queued', next_attempt_at = ?, updated_at = ? "
+            "WHERE status = 'running' AND updated_at < ?",
+            (now, now, now - ARCHIVE_JOB_LEASE_SECONDS)
+        )
+        return cursor.rowcount
+    finally:
+        connection.close()
+
+
+def run_next_job(handler=process_student_data):
+    """
+    Claims and runs one due job. Its lease is renewed by a heartbeat thread while the handler runs.
+
+    Parameters:
+    - handler (callable): Called with the job payload; its return value is stored as the job result.
+
+    Returns:
+    - bool: True if a job was run, False if none was due.
+    """
+    job = claim_job()
+    if job is None:
+        return False
+    stop_heartbeat = threading.Event()
+    threading.Thread(target=heartbeat, args=(job, stop_heartbeat), name=f"archive-heartbeat-{job['job_id']}", daemon=True).start()
+    try:
+        result = handler(job['payload'])
+    except Exception as e:
+        print(f"Archive job {job['job_id']} failed (attempt {job['attempts']}/{job['max_attempts']}): {e}")
+        # Errors such as RepoTooLargeError set retryable = False
+        fail_job(job, "".join(traceback.format_exception_only(type(e), e)).strip(), retry=getattr(e, 'retryable', True))
+    else:
+        complete_job(job['job_id'], result)
+        print(f"Archive job {job['job_id']} done")
+    finally:
+        stop_heartbeat.set()
+    return True
+
+
+def worker_loop(stop_event, handler=process_student_data):
+    """
+    Runs jobs until `stop_event` is set, sleeping while the queue is empty. Every iteration first queues again
+    the jobs of workers that died, whichever process they ran in.
+    """
+    while not stop_event.is_set():
+        try:
+            requeue_stale_jobs()
+            if run_next_job(handler):
+                continue
+        except Exception as e:
+            print(f"Archive worker error: {e}")
+        stop_event.wait(ARCHIVE_JOB_POLL_INTERVAL)
+
+
+_workers = []
+_workers_lock = threading.Lock()
+_stop_event = threading.Event()
+
+def start_workers(count=None, handler=process_student_data):
+    """
+    Starts the worker threads of this process, once. Later calls return the threads already running.
+
+    Parameters:
+    - count (int): Number of workers, `ARCHIVE_WORKERS` by default.
+    - handler (callable): See `run_next_job`.
+
+    Returns:
+    - list of Thread: The worker threads.
+    """
+    with _workers_lock:
+        if not _workers:
+            for index in range(ARCHIVE_WORKERS if count is None else count):
+                worker = threading.Thread(
+                    target=worker_loop, args=(_stop_event, handler), name=f"archive-worker-{index}", daemon=True
+                )
+                worker.start()
+                _workers.append(worker)
+        return list(_workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the repository archive workers outside of the Streamlit server.")
+    parser.add_argument("--workers", type=int, default=ARCHIVE_WORKERS, help="Number of worker threads.")
+    parser.add_argument("--drain", action="store_true", help="Run the due jobs and exit instead of waiting for new ones.")
+    args = parser.parse_args()
+
+    if args.drain:
+        requeue_stale_jobs()
+        while run_next_job():
+            pass
+        return
+    for worker in start_workers(args.workers):
+        worker.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from archive_store import object_exists, read_object
+from data_management import run_select
+from repo_validation import GIT_LS_REMOTE_TIMEOUT, normalize_github_url
+from utils import ARCHIVE_BUCKET, ARCHIVE_RECORD_NAME, RepoTooLargeError, process_student_data, run_git
+
+
+def fetch_completed_projects(semester, year):
+    """
+    Fetches the completed projects of a semester.
+
+    Parameters:
+    - semester (str): e.g. 'Fall'.
+    - year (str): e.g. '2024'.
+
+    Returns:
+    - list of dict: proposal_id, name, semester, year and github_link of every completed project.
+    """
+    query = """
+    SELECT proposal_id, name, semester, year, github_link
+    FROM student_infos
+    WHERE status = 'Completed' AND semester = :semester AND year = :year
+    ORDER BY proposal_id
+    """
+    return run_select(query, {'semester': semester, 'year': year}).to_dict('records')
+
+
+def remote_head(repo_url):
+    """Returns the commit the repository's HEAD points to, without cloning it."""
+    output = run_git(['ls-remote', repo_url, 'HEAD'], timeout=GIT_LS_REMOTE_TIMEOUT)
+    return output.split()[0] if output.strip() else None
+
+
+def last_archived_commit(bucket_name, student_data):
+    """Returns the commit recorded by the last archive of a project, or None if it was never archived."""
+    name = f"projects/{student_data['semester']}/{student_data['name']}/{ARCHIVE_RECORD_NAME}"
+    if not object_exists(bucket_name, name):
+        return None
+    return json.loads(read_object(bucket_name, name)).get('commit')
+
+
+def archive_project(project, bucket_name, attempts, force, slots=None):
+    """
+    Archives one completed project unless its current commit is already archived.
+
+    Parameters:
+    - slots (Semaphore): Passed to `process_student_data`.
+
+    Returns:
+    - dict: The project's proposal_id and repository, its outcome ('archived', 'skipped' or 'failed') and the
+      statistics of `process_student_data` or the error.
+    """
+    repo_url = normalize_github_url(project['github_link'] or '') or project['github_link']
+    student_data = {
+        'semester': f"{project['semester']} {project['year']}",
+        'name': str(project['name']),
+        'repo_url': repo_url,
+        'bucket': bucket_name,
+    }
+    outcome = {'proposal_id': project['proposal_id'], 'repo_url': repo_url}
+    for attempt in range(1, attempts + 1):
+        try:
+            if not force:
+                head = remote_head(repo_url)
+                if head is not None and head == last_archived_commit(bucket_name, student_data):
+                    return dict(outcome, status='skipped', commit=head)
+            return dict(outcome, status='archived', **process_student_data(student_data, slots))
+        except RepoTooLargeError as e:
+            return dict(outcome, status='failed', error=str(e))
+        except Exception as e:
+            if attempt == attempts:
+                return dict(outcome, status='failed', error=str(e))
+            time.sleep(2 ** attempt)
+
+
+def archive_semester(semester, year, bucket_name=ARCHIVE_BUCKET, workers=4, attempts=2, force=False):
+    """
+    Archives every completed project of a semester with `workers` archives running at the same time.
+
+    Parameters:
+    - semester (str): e.g. 'Fall'.
+    - year (str): e.g. '2024'.
+    - bucket_name (str): A GCS bucket name, or a file:// URL of a local directory.
+    - workers (int): Archives running concurrently.
+    - attempts (int): Tries per repository before it is reported as failed.
+    - force (bool): Archive again the repositories whose current commit is already archived.
+
+    Returns:
+    - list of dict: The outcome of every project, see `archive_project`.
+    """
+    projects = fetch_completed_projects(semester, year)
+    print(f"{len(projects)} completed projects in {semester} {year}")
+    # Sized for this run instead of the process-wide ARCHIVE_MAX_CONCURRENT cap of process_student_data
+    slots = threading.BoundedSemaphore(workers)
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(archive_project, project, bucket_name, attempts, force, slots) for project in projects]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"[{len(results)}/{len(projects)}] {result['status']} {result['repo_url']}"
+                  + (f": {result['error']}" if result['status'] == 'failed' else ""))
+    return results
+
+
+def print_report(results, seconds):
+    """Prints how many projects were archived, skipped and failed, the throughput and the bytes moved."""
+    counts = {status: sum(1 for result in results if result['status'] == status) for status in ('archived', 'skipped', 'failed')}
+    archived = [result for result in results if result['status'] == 'archived']
+    transferred = sum(result.get('transferred_bytes', 0) for result in archived)
+    uploaded = sum(result.get('uploaded_bytes', result.get('archive_bytes', 0)) for result in archived)
+    print(f"\n{len(results)} projects in {seconds:.1f}s ({len(results) / seconds * 60 if seconds else 0:.1f} per minute): "
+          f"{counts['archived']} archived, {counts['skipped']} already up to date, {counts['failed']} failed")
+    print(f"Cloned {transferred / 1e6:.1f} MB, uploaded {uploaded / 1e6:.1f} MB"
+          + (f", {transferred / 1e6 / seconds:.1f} MB/s cloned" if seconds else ""))
+    for result in results:
+        if result['status'] == 'failed':
+            print(f"FAILED {result['proposal_id']} {result['repo_url']}: {result['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive the repositories of every completed project of a semester.")
+    parser.add_argument("semester", help="Semester, e.g. Fall.")
+    parser.add_argument("year", help="Year, e.g. 2024.")
+    parser.add_argument("--bucket", default=ARCHIVE_BUCKET, help="GCS bucket name or file:// directory.")
+    parser.add_argument("--workers", type=int, default=4, help="Archives running at the same time.")
+    parser.add_argument("--attempts", type=int, default=2, help="Tries per repository.")
+    parser.add_argument("--force", action="store_true", help="Archive again the repositories already archived at their current commit.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = archive_semester(args.semester, args.year, args.bucket, args.workers, args.attempts, args.force)
+    print_report(results, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Prefix of the content-addressed objects, shared by every submission of every semester
+CAS_PREFIX = 'cas/sha256'
+MANIFEST_VERSION = 1
+# Objects checked and uploaded concurrently while storing a snapshot
+ARCHIVE_UPLOAD_THREADS = int(os.getenv('ARCHIVE_UPLOAD_THREADS', 8))
+
+_gcs_client = None
+_gcs_client_lock = threading.Lock()
+# Content-addressed objects known to exist, per bucket. They never change, so they are never checked again.
+_known_objects = {}
+_known_objects_lock = threading.Lock()
+
+
+def get_bucket(bucket_name):
+    """Returns the GCS bucket, with a storage client created on first use."""
+    global _gcs_client
+    from google.cloud import storage
+    with _gcs_client_lock:
+        if _gcs_client is None:
+            _gcs_client = storage.Client()
+    return _gcs_client.bucket(bucket_name)
+
+
+def local_path(bucket_name, name):
+    """Returns the path of an object of a file:// bucket."""
+    return os.path.join(bucket_name[len('file://'):], name)
+
+
+def object_exists(bucket_name, name):
+    """Checks whether an object exists in a GCS bucket or a file:// directory."""
+    if bucket_name.startswith('file://'):
+        return os.path.exists(local_path(bucket_name, name))
+    return get_bucket(bucket_name).blob(name).exists()
+
+
+@contextlib.contextmanager
+def atomic_file(path):
+    """
+    Opens a binary file written under a temporary name and renamed to `path` once the block exits without
+    error, so that readers never see partial content. A failed write leaves nothing behind.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, partial_path = tempfile.mkstemp(suffix='.part', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            yield file
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def write_object(bucket_name, name, data, content_type='application/octet-stream'):
+    """Writes a whole object. Local objects are renamed into place so that readers never see partial content."""
+    if bucket_name.startswith('file://'):
+        with atomic_file(local_path(bucket_name, name)) as file:
+            file.write(data)
+    else:
+        get_bucket(bucket_name).blob(name).upload_from_string(data, content_type=content_type)
+
+
+def read_object(bucket_name, name):
+    """Reads a whole object."""
+    if bucket_name.startswith('file://'):
+        with open(local_path(bucket_name, name), 'rb') as file:
+            return file.read()
+    return get_bucket(bucket_name).blob(name).download_as_bytes()
+
+
+def object_name(digest):
+    """Returns the name of the content-addressed object holding the gzip-compressed content with this SHA-256."""
+    return f"{CAS_PREFIX}/{digest[:2]}/{digest}.gz"
+
+
+def file_digest(path):
+    """Returns the hex SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_archived_files(source_dir, include_extensions, include_files):
+    """
+    Yields the relative paths of the files of a repository that are archived, in a stable order.
+
+    Parameters:
+    - source_dir (str): The repository checkout. Its .git directory is skipped.
+    - include_extensions (list of str): File extensions to archive.
+    - include_files (list of str): File names to archive.
+    """
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if d != '.git')
+        for file in sorted(files):
+            if file.endswith(tuple(include_extensions)) or file in include_files:
+                yield os.path.relpath(os.path.join(root, file), start=source_dir)
+
+
+def put_content_addressed(bucket_name, name, load, content_type='application/octet-stream'):
+    """
+    Writes a content-addressed object unless it is already stored.
+
+    Parameters:
+    - bucket_name (str): A GCS bucket name, or a file:// URL of a local directory.
+    - name (str): The object name, derived from the hash of its content.
+    - load (callable): Returns the bytes to write, only called when the object is missing.
+    - content_type (str): The content type of the object.
+
+    Returns:
+    - int: The bytes written, 0 when the object was already stored.
+    """
+    with _known_objects_lock:
+        if name in _known_objects.get(bucket_name, ()):
+            return 0
+    uploaded = 0
+    if not object_exists(bucket_name, name):
+        data = load()
+        write_object(bucket_name, name, data, content_type=content_type)
+        uploaded = len(data)
+    with _known_objects_lock:
+        _known_objects.setdefault(bucket_name, set()).add(name)
+    return uploaded
+
+
+def ensure_object(bucket_name, digest, path):
+    """
+    Uploads a file under its content address unless the object already exists.
+
+    Returns:
+    - int: The compressed bytes uploaded, 0 when the object was already stored.
+    """
+    def load():
+        with open(path, 'rb') as file:
+            return gzip.compress(file.read(), mtime=0)
+
+    return put_content_addressed(bucket_name, object_name(digest), load, content_type='application/gzip')
+
+
+def store_snapshot(bucket_name, source_dir, manifest_prefix, include_extensions, include_files, metadata=None):
+    """
+    Stores the archived files of a repository content-addressed and writes the manifest of the snapshot.
+
+    Each distinct content is uploaded once per bucket, so the files unchanged since a previous submission,
+    and starter code shared by several students, cost one existence check instead of an upload.
+
+    Parameters:
+    - bucket_name (str): A GCS bucket name, or a file:// URL of a local directory.
+    - source_dir (str): The repository checkout.
+    - manifest_prefix (str): Where the manifests go, e.g. 'projects/Fall 2024/alice'. The snapshot is written
+      to `<prefix>/manifests/<UTC time>.json` and copied to `<prefix>/manifest.json` as the latest one.
+    - include_extensions (list of str): File extensions to archive.
+    - include_files (list of str): File names to archive.
+    - metadata (dict): Extra fields saved in the manifest, e.g. the repository URL.
+
+    Returns:
+    - dict: The manifest name, the number of files, their total size, how many objects were uploaded and the
+      bytes uploaded.
+    """
+    entries = []
+    for relative_path in iter_archived_files(source_dir, include_extensions, include_files):
+        path = os.path.join(source_dir, relative_path)
+        entries.append({'path': relative_path.replace(os.sep, '/'), 'sha256': file_digest(path),
+                        'size': os.path.getsize(path)})
+
+    unique = {entry['sha256']: os.path.join(source_dir, entry['path']) for entry in entries}
+    with ThreadPoolExecutor(max_workers=ARCHIVE_UPLOAD_THREADS) as executor:
+        uploads = list(executor.map(lambda item: ensure_object(bucket_name, *item), unique.items()))
+
+    created_at = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+    manifest = dict(metadata or {}, version=MANIFEST_VERSION, created_at=created_at, files=entries)
+    manifest_data = json.dumps(manifest, indent=1).encode()
+    manifest_name = f"{manifest_prefix}/manifests/{created_at}.json"
+    write_object(bucket_name, manifest_name, manifest_data, content_type='application/json')
+    write_object(bucket_name, f"{manifest_prefix}/manifest.json", manifest_data, content_type='application/json')
+    return {
+        'manifest': manifest_name,
+        'files': len(entries),
+        'total_bytes': sum(entry['size'] for entry in entries),
+        'uploaded_objects': sum(1 for size in uploads if size),
+        'uploaded_bytes': sum(uploads),
+    }
+
+
+def restore_snapshot(bucket_name, manifest_name, destination_dir):
+    """
+    Recreates the files of a snapshot from its manifest.
+
+    Parameters:
+    - bucket_name (str): A GCS bucket name, or a file:// URL of a local directory.
+    - manifest_name (str): The manifest object, e.g. 'projects/Fall 2024/alice/manifest.json'.
+    - destination_dir (str): The directory to write the files to.
+
+    Returns:
+    - int: The number of files restored.
+    """
+    manifest = json.loads(read_object(bucket_name, manifest_name))
+    for entry in manifest['files']:
+        content = gzip.decompress(read_object(bucket_name, object_name(entry['sha256'])))
+        if hashlib.sha256(content).hexdigest() != entry['sha256']:
+            raise RuntimeError(f"Object {entry['sha256']} does not match its address, {entry['path']} is corrupted.")
+        path = os.path.join(destination_dir, *entry['path'].split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(content)
+    return len(manifest['files'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restore a repository snapshot from the content-addressed archive store.")
+    parser.add_argument("manifest", help="The manifest object, e.g. 'projects/Fall 2024/alice/manifest.json'.")
+    parser.add_argument("destination", help="The directory to restore the files to.")
+    parser.add_argument("--bucket", default=os.getenv('ARCHIVE_BUCKET', 'projects-capstone'),
+                        help="GCS bucket name or file:// directory.")
+    args = parser.parse_args()
+
+    count = restore_snapshot(args.bucket, args.manifest, args.destination)
+    print(f"Restored {count} files to {args.destination}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import sqlalchemy
+from sqlalchemy import text
+from data_management import engine, IMAGE_COLUMNS, resolve_proposal_media, save_proposal_thumbnails
+from migrations import apply_migrations
+
+
+def fetch_unprocessed_batch(connection, after_id, batch_size):
+    """
+    Fetches the next batch of proposals missing at least one row in proposal_thumbnails.
+
+    Proposals are walked in proposal_id order starting after `after_id`, so a proposal whose images cannot be
+    decoded is reported once instead of being picked up again by every batch.
+
+    Parameters:
+    - connection (Connection): An open database connection.
+    - after_id (str): The last proposal_id of the previous batch, '' for the first one.
+    - batch_size (int): The maximum number of proposals to return.
+
+    Returns:
+    - list of dict: The proposals of the batch, with their proposal_id and images.
+    """
+    ids_query = """
+    SELECT s.proposal_id
+    FROM student_infos s
+    LEFT JOIN proposal_thumbnails t ON t.proposal_id = s.proposal_id
+    WHERE s.proposal_id > :after_id
+    GROUP BY s.proposal_id
+    HAVING COUNT(t.image_column) < :image_count
+    ORDER BY s.proposal_id
+    LIMIT :batch_size
+    """
+    proposal_ids = connection.execute(
+        text(ids_query),
+        {'after_id': after_id, 'image_count': len(IMAGE_COLUMNS), 'batch_size': batch_size}
+    ).scalars().all()
+    if not proposal_ids:
+        return []
+
+    images_query = text(
+        "SELECT proposal_id, objective_image, dataset_image, possible_issues_image, "
+        "objective_image_ref, dataset_image_ref, possible_issues_image_ref "
+        "FROM student_infos WHERE proposal_id IN :proposal_ids ORDER BY proposal_id"
+    ).bindparams(sqlalchemy.bindparam("proposal_ids", expanding=True))
+    rows = [dict(row) for row in connection.execute(images_query, {'proposal_ids': proposal_ids}).mappings()]
+    return resolve_proposal_media(rows)
+
+
+def backfill_thumbnails(batch_size=50):
+    """
+    Generates the stored thumbnails of every proposal written before they were introduced.
+
+    Each batch is committed on its own, so the command can be interrupted and started again and will carry on
+    with the proposals that are still missing thumbnails.
+
+    Parameters:
+    - batch_size (int): How many proposals are read and written per transaction.
+
+    Returns:
+    - tuple: The number of proposals processed and the number of images that could not be decoded.
+    """
+    processed = 0
+    failed = 0
+    after_id = ''
+    apply_migrations(engine)
+    with engine.connect() as connection:
+        while True:
+            batch = fetch_unprocessed_batch(connection, after_id, batch_size)
+            if not batch:
+                break
+            for proposal in batch:
+                rows = save_proposal_thumbnails(connection, proposal)
+                failed += len(IMAGE_COLUMNS) - len(rows)
+            connection.commit()
+            processed += len(batch)
+            after_id = batch[-1]['proposal_id']
+            print(f"Processed {processed} proposals")
+    return processed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the stored thumbnails of existing proposals.")
+    parser.add_argument("--batch-size", type=int, default=50, help="Proposals read and written per transaction.")
+    args = parser.parse_args()
+
+    processed, failed = backfill_thumbnails(args.batch_size)
+    print(f"Done: {processed} proposals processed, {failed} images could not be decoded.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import base64
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from archive_codecs import CODECS
+from utils import ARCHIVE_EXTENSIONS, ARCHIVE_FILES, directory_size, stream_directory_archive
+
+
+WORDS = ["import", "pandas", "as", "pd", "numpy", "np", "def", "return", "model", "fit", "predict", "df", "train",
+         "test", "for", "in", "range", "if", "else", "print", "accuracy", "loss", "epoch", "features", "target"]
+
+
+class NullWriter:
+    """Discards the archive, so that only the compression is measured."""
+
+    def write(self, data):
+        return len(data)
+
+
+def random_code(rng, lines):
+    return "\n".join(
+        "    " * rng.randint(0, 2) + " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 10)))
+        for _ in range(lines)
+    )
+
+
+def random_notebook(rng, cells, image_bytes):
+    """A notebook whose cells hold code and, for some of them, a PNG-like output that barely compresses."""
+    notebook_cells = []
+    for _ in range(cells):
+        cell = {"cell_type": "code", "metadata": {}, "source": random_code(rng, rng.randint(3, 30)), "outputs": []}
+        if rng.random() < 0.3:
+            image = base64.b64encode(rng.getrandbits(8 * image_bytes).to_bytes(image_bytes, 'little')).decode()
+            cell["outputs"].append({"output_type": "display_data", "data": {"image/png": image}, "metadata": {}})
+        notebook_cells.append(cell)
+    return json.dumps({"cells": notebook_cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}, indent=1)
+
+
+def make_student_repo(path, seed, python_files, notebooks):
+    """Writes a synthetic student repository: Python modules, notebooks with plot outputs and a README."""
+    rng = random.Random(seed)
+    for index in range(python_files):
+        file_path = os.path.join(path, f"src/module_{index}.py")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            file.write(random_code(rng, rng.randint(50, 400)))
+    for index in range(notebooks):
+        file_path = os.path.join(path, f"notebooks/analysis_{index}.ipynb")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            file.write(random_notebook(rng, rng.randint(10, 60), image_bytes=20000))
+    with open(os.path.join(path, "README.md"), 'w') as file:
+        file.write(random_code(rng, 40))
+
+
+def run_benchmark(repo_dir, codecs, levels, repeat):
+    """
+    Archives `repo_dir` with every codec and level.
+
+    Returns:
+    - list of dict: codec, level, seconds (best of `repeat`), throughput in MB/s of input and compression ratio.
+    """
+    input_bytes = directory_size(repo_dir)
+    results = []
+    for codec in codecs:
+        for level in levels.get(codec) or [CODECS[codec][1]]:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output_bytes = stream_directory_archive(repo_dir, NullWriter(), ARCHIVE_EXTENSIONS, ARCHIVE_FILES,
+                                                        codec=codec, level=level)
+                timings.append(time.perf_counter() - start)
+            seconds = min(timings)
+            results.append({
+                'codec': codec,
+                'level': level,
+                'seconds': seconds,
+                'throughput_mb_s': input_bytes / seconds / 1e6,
+                'ratio': input_bytes / output_bytes,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the archive codecs on a synthetic student repository.")
+    parser.add_argument("--python-files", type=int, default=200, help="Python modules in the synthetic repository.")
+    parser.add_argument("--notebooks", type=int, default=40, help="Notebooks in the synthetic repository.")
+    parser.add_argument("--codecs", nargs="+", default=list(CODECS), choices=list(CODECS), help="Codecs to compare.")
+    parser.add_argument("--gzip-levels", type=int, nargs="+", default=[1, 6, 9], help="Levels for gzip and pgzip.")
+    parser.add_argument("--zstd-levels", type=int, nargs="+", default=[1, 3, 9, 19], help="Levels for zstd.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration, the fastest is reported.")
+    args = parser.parse_args()
+
+    levels = {'gzip': args.gzip_levels, 'pgzip': args.gzip_levels, 'zstd': args.zstd_levels}
+    repo_dir = tempfile.mkdtemp(prefix='archive-benchmark-')
+    try:
+        make_student_repo(repo_dir, seed=0, python_files=args.python_files, notebooks=args.notebooks)
+        print(f"Synthetic repository: {directory_size(repo_dir) / 1e6:.1f} MB")
+        print(f"{'codec':<8}{'level':>6}{'seconds':>10}{'MB/s':>10}{'ratio':>8}")
+        for result in run_benchmark(repo_dir, args.codecs, levels, args.repeat):
+            print(f"{result['codec']:<8}{result['level']:>6}{result['seconds']:>10.3f}"
+                  f"{result['throughput_mb_s']:>10.1f}{result['ratio']:>8.2f}")
+    finally:
+        shutil.rmtree(repo_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
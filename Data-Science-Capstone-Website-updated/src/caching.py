@@ -0,0 +1,240 @@
+import sys
+import threading
+from cachetools import Cache, LRUCache, TTLCache
+
+
+def estimate_size(value):
+    """
+    Estimates how many bytes a cached value keeps alive.
+
+    DataFrames report their deep memory usage (which includes BLOB columns), bytes and strings their length,
+    and containers the sum of their items. Anything else falls back to `sys.getsizeof`.
+
+    Parameters:
+    - value: The value about to be cached.
+
+    Returns:
+    - int: The estimated size in bytes, at least 1.
+    """
+    if hasattr(value, 'memory_usage'):
+        size = int(value.memory_usage(index=True, deep=True).sum())
+    elif isinstance(value, (bytes, bytearray, str)):
+        size = len(value)
+    elif isinstance(value, dict):
+        size = sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size = sum(estimate_size(item) for item in value)
+    else:
+        size = sys.getsizeof(value)
+    return max(size, 1)
+
+
+class _EvictionCallbackMixin:
+    """Reports every entry dropped to make room for a new one."""
+    on_evict = None
+
+    def popitem(self):
+        key, value = super().popitem()
+        if self.on_evict is not None:
+            self.on_evict(key)
+        return key, value
+
+
+class _LRUStore(_EvictionCallbackMixin, LRUCache):
+    pass
+
+
+class _TTLStore(_EvictionCallbackMixin, TTLCache):
+    """Also reports the removal of expired entries, which happens before every insertion."""
+    on_expire = None
+
+    def expire(self, time=None):
+        # Cache.__len__ counts the expired entries too, the TTLCache one expires them first
+        size = Cache.__len__(self)
+        super().expire(time)
+        if self.on_expire is not None and Cache.__len__(self) < size:
+            self.on_expire()
+
+
+class ResultCache:
+    """
+    Thread-safe, process-wide cache for expensive results with a byte budget and tag based invalidation.
+
+    Entries are evicted least-recently-used first once `max_bytes` is exceeded and, when `ttl` is set, expire
+    `ttl` seconds after being stored. Each entry can carry tags so that a write can drop exactly the entries
+    it affects with `invalidate`. Streamlit keeps imported modules alive between reruns, so a module-level
+    instance is shared by every rerun and every session of the server process.
+
+    Cached values are shared between sessions and must be treated as read-only by callers.
+    """
+
+    def __init__(self, max_bytes, ttl=None):
+        if ttl:
+            self._store = _TTLStore(maxsize=max_bytes, ttl=ttl, getsizeof=estimate_size)
+        else:
+            self._store = _LRUStore(maxsize=max_bytes, getsizeof=estimate_size)
+        self._store.on_evict = self._forget
+        self._store.on_expire = self._forget_expired
+        self._lock = threading.RLock()
+        self._tags = {}
+        self._key_tags = {}
+        # Bumped by every invalidation so that a load racing with a write is not stored
+        self._generation = 0
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _forget(self, key):
+        """Drops the tag bookkeeping of an evicted key. Called with the lock held."""
+        self.evictions += 1
+        self._drop_tags(key)
+
+    def _forget_expired(self):
+        """Drops the tag bookkeeping of the keys the TTL store has just expired. Called with the lock held."""
+        for key in [key for key in self._key_tags if not Cache.__contains__(self._store, key)]:
+            self.expirations += 1
+            self._drop_tags(key)
+
+    def _drop_tags(self, key):
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get_or_load(self, key, loader, tags=()):
+        """
+        Returns the cached value for `key`, calling `loader` and caching its result on a miss.
+
+        Exceptions raised by `loader` propagate and nothing is cached, so failed queries are retried on the
+        next call. Values larger than the whole budget are returned without being cached.
+
+        Parameters:
+        - key (hashable): Identifies the result, e.g. the query name and its parameters.
+        - loader (callable): Produces the value when it is not cached.
+        - tags (iterable of str): Tags used by `invalidate` to find this entry.
+
+        Returns:
+        - The cached or freshly loaded value.
+        """
+        with self._lock:
+            try:
+                value = self._store[key]
+            except KeyError:
+                self.misses += 1
+                generation = self._generation
+            else:
+                self.hits += 1
+                return value
+
+        value = loader()
+
+        with self._lock:
+            if generation != self._generation:
+                return value
+            try:
+                self._store[key] = value
+            except ValueError:
+                # Larger than the whole budget
+                return value
+            self._key_tags[key] = tuple(tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+        return value
+
+    def get_many_or_load(self, keys, loader, tags=lambda key: ()):
+        """
+        Batched variant of `get_or_load`: the keys that are not cached are loaded with a single `loader` call.
+
+        Parameters:
+        - keys (iterable of hashable): The entries wanted.
+        - loader (callable): Receives the list of missing keys and returns a dict mapping each of them to its value.
+        - tags (callable): Returns the tags of the entry stored under a given key.
+
+        Returns:
+        - dict: Maps every requested key to its value.
+        """
+        values = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                if key in values or key in missing:
+                    continue
+                try:
+                    values[key] = self._store[key]
+                except KeyError:
+                    self.misses += 1
+                    missing.append(key)
+                else:
+                    self.hits += 1
+            generation = self._generation
+
+        if not missing:
+            return values
+        loaded = loader(missing)
+        values.update(loaded)
+
+        with self._lock:
+            if generation != self._generation:
+                return values
+            for key, value in loaded.items():
+                try:
+                    self._store[key] = value
+                except ValueError:
+                    continue
+                key_tags = tuple(tags(key))
+                self._key_tags[key] = key_tags
+                for tag in key_tags:
+                    self._tags.setdefault(tag, set()).add(key)
+        return values
+
+    def invalidate(self, *tags):
+        """
+        Drops every entry carrying at least one of the given tags.
+
+        Parameters:
+        - tags (str): The tags whose entries are stale.
+        """
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._key_tags.pop(key, None)
+                    if self._store.pop(key, None) is not None:
+                        self.invalidations += 1
+
+    def clear(self):
+        """Drops every entry. Counters are kept."""
+        with self._lock:
+            self._generation += 1
+            self._store.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+
+    def stats(self):
+        """
+        Reports the counters needed to tune the TTL and the byte budget.
+
+        Returns:
+        - dict: hits, misses, hit_rate, evictions (entries dropped for space), expirations (entries dropped after
+          `ttl`), invalidations (entries dropped by writes), entries, bytes currently used, max_bytes and ttl.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'entries': len(self._store),
+                'bytes': self._store.currsize,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+            }
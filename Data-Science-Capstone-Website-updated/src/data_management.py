@@ -1,7 +1,7 @@
 import streamlit as st
 from PIL import Image
 import pandas as pd
-from utils import pil_image_to_base64,format_proposal_as_markdown, resize_image, generate_unique_id,handle_image_markdown,convert_image_to_binary
+from utils import pil_image_to_base64,format_proposal_as_markdown, resize_image, generate_unique_id,handle_image_markdown,convert_image_to_binary,get_thumbnail,image_content_hash
 import base64
 from io import BytesIO
 import os
@@ -13,6 +13,13 @@ import sqlalchemy
 from sqlalchemy import create_engine,text
 from google.cloud.sql.connector import Connector, IPTypes
 import io
+import threading
+import time
+from tenacity import Retrying, stop_after_attempt, wait_random_exponential
+from caching import ResultCache
+from db_metrics import InstrumentedQueuePool, instrument_pool, instrument_queries, pool_metrics, query_metrics
+from media_store import get_many_media, put_media
+from migrations import apply_migrations
 
 
 load_dotenv() # take environment variables from .env.
@@ -60,29 +67,189 @@ PASSWORD = os.getenv("STREAMLIT_PASSWORD")
 
 
 
-connector = Connector()
+# Connection pool sizing. Every Streamlit session runs its queries on the server process' shared pool, so
+# `DB_POOL_SIZE + DB_MAX_OVERFLOW` bounds the Cloud SQL connections one server process opens.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # Seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+# Attempts and maximum backoff in seconds when opening a new connection fails
+DB_CONNECT_ATTEMPTS = int(os.getenv('DB_CONNECT_ATTEMPTS', 4))
+DB_CONNECT_MAX_BACKOFF = float(os.getenv('DB_CONNECT_MAX_BACKOFF', 8))
+# Raw SQLAlchemy statement logging, parameters included. Only meant for local debugging.
+DB_ECHO = os.getenv('DB_ECHO', 'false').lower() in ('1', 'true', 'yes')
+# Query timing: 'off', 'histogram', 'sampled' or 'all', see `db_metrics.instrument_queries`
+DB_QUERY_LOG = os.getenv('DB_QUERY_LOG', 'sampled').lower()
+DB_QUERY_LOG_SAMPLE_RATE = float(os.getenv('DB_QUERY_LOG_SAMPLE_RATE', 0.01))
+DB_SLOW_QUERY_SECONDS = float(os.getenv('DB_SLOW_QUERY_SECONDS', 1.0))
+
+_connector = None
+_connector_lock = threading.Lock()
+
+def get_connector():
+    """Returns the Cloud SQL connector, created on first use rather than at import."""
+    global _connector
+    with _connector_lock:
+        if _connector is None:
+            _connector = Connector()
+        return _connector
+
+def log_connect_retry(retry_state):
+    """Reports a failed connection attempt before the backoff sleep."""
+    print(f"Connecting to the database failed (attempt {retry_state.attempt_number}/{DB_CONNECT_ATTEMPTS}): "
+          f"{retry_state.outcome.exception()}")
 
 def get_connection():
-    """Function to create a database connection."""
+    """
+    Opens a new database connection for the engine's pool.
+
+    Failed attempts are retried with randomized exponential backoff, so that the sessions hitting an
+    unavailable database at the same time do not reconnect in lockstep. Once the attempts are exhausted the
+    last error is raised and surfaces from the query that needed the connection.
+
+    Returns:
+    - Connection: A pymysql connection to the Cloud SQL instance.
+    """
+    start = time.perf_counter()
     try:
-        conn = connector.connect(
-            os.getenv('INSTANCE_CONNECTION_NAME'),
-            "pymysql",
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASS'),
-            db=os.getenv('DB_NAME')
-        )
-        return conn
-    except Exception as e:
-        st.write(f"Failed to connect to database: {e}")
-        return None
+        for attempt in Retrying(
+            stop=stop_after_attempt(DB_CONNECT_ATTEMPTS),
+            wait=wait_random_exponential(multiplier=0.5, max=DB_CONNECT_MAX_BACKOFF),
+            before_sleep=log_connect_retry,
+            reraise=True
+        ):
+            with attempt:
+                conn = get_connector().connect(
+                    os.getenv('INSTANCE_CONNECTION_NAME'),
+                    "pymysql",
+                    user=os.getenv('DB_USER'),
+                    password=os.getenv('DB_PASS'),
+                    db=os.getenv('DB_NAME')
+                )
+    except Exception:
+        pool_metrics.record_connect(time.perf_counter() - start, ok=False)
+        raise
+    pool_metrics.record_connect(time.perf_counter() - start, ok=True)
+    return conn
 
 # Create SQLAlchemy engine using the connection creator function
 engine = sqlalchemy.create_engine(
     "mysql+pymysql://",
     creator=get_connection,
-    echo=True  # Optional: Use True to enable SQL logging, helpful for debugging
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    echo=DB_ECHO
 )
+instrument_pool(engine)
+instrument_queries(engine, mode=DB_QUERY_LOG, sample_rate=DB_QUERY_LOG_SAMPLE_RATE, slow_seconds=DB_SLOW_QUERY_SECONDS)
+
+def pool_stats():
+    """Returns the checkout latency and saturation of the connection pool, see `PoolMetrics.stats`."""
+    return pool_metrics.stats(engine.pool)
+
+def query_stats():
+    """Returns the latency histogram of every statement run by this process, see `QueryMetrics.stats`."""
+    return query_metrics.stats()
+
+_schema_ready = False
+
+def ensure_schema():
+    """
+    Applies the pending schema migrations (see migrations.py) once per server process.
+
+    Called at the start of every rerun; after the first successful run it returns immediately. A failure is
+    reported and retried by the next rerun.
+
+    Returns:
+    - bool: True if the schema is up to date.
+    """
+    global _schema_ready
+    if not _schema_ready:
+        try:
+            apply_migrations(engine)
+            _schema_ready = True
+        except Exception as e:
+            st.error(f"Failed to apply the database migrations: {e}")
+    return _schema_ready
+
+# Process-wide cache shared by every session for the read queries below. Writes invalidate the entries they
+# affect. `sync_changes` drops the entries of the rows changed by other server processes when it sees them,
+# the TTL bounds how stale the others can get.
+query_cache = ResultCache(
+    max_bytes=int(os.getenv('QUERY_CACHE_MAX_BYTES', 128 * 1024 * 1024)),
+    ttl=float(os.getenv('QUERY_CACHE_TTL_SECONDS', 60))
+)
+
+# Cache tag carried by every query that reads several rows of student_infos
+PROPOSALS_TAG = 'student_infos'
+
+def proposal_tag(proposal_id):
+    """Cache tag carried by the queries that read a single proposal."""
+    return f"proposal:{proposal_id}"
+
+def invalidate_proposal_cache(proposal_id=None):
+    """
+    Drops the cached reads affected by a write to student_infos.
+
+    Every multi-row query is dropped since any write can change it, but of the single-proposal queries only
+    the ones for `proposal_id` are.
+
+    Parameters:
+    - proposal_id (str): The proposal that was inserted, updated or deleted.
+    """
+    global _change_checked_at
+    _change_checked_at = 0
+    if proposal_id is None:
+        query_cache.invalidate(PROPOSALS_TAG)
+    else:
+        query_cache.invalidate(PROPOSALS_TAG, proposal_tag(proposal_id))
+
+def invalidate_proposals_cache(proposal_ids):
+    """Batched variant of `invalidate_proposal_cache` for a write touching several proposals."""
+    global _change_checked_at
+    _change_checked_at = 0
+    query_cache.invalidate(PROPOSALS_TAG, *[proposal_tag(proposal_id) for proposal_id in proposal_ids])
+
+def record_changes(connection, proposal_ids, deleted=False):
+    """
+    Stamps a write to student_infos with the next change version, inside the caller's transaction.
+
+    Every write function calls it before committing. The counter row stays locked until the commit, so the
+    versions become visible in the order they were handed out and a reader that saw version N never misses a
+    write numbered N or lower (see `sync_changes`).
+
+    Parameters:
+    - connection (Connection): The connection the write is being made with.
+    - proposal_ids (list of str): The proposals inserted, updated or deleted.
+    - deleted (bool): True if the proposals were deleted, they are then recorded in student_infos_deletions.
+
+    Returns:
+    - int: The change version of the write.
+    """
+    connection.execute(text("UPDATE change_sequence SET version = LAST_INSERT_ID(version + 1) WHERE id = 1"))
+    version = connection.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+    if deleted:
+        query = """
+        INSERT INTO student_infos_deletions (proposal_id, change_version) VALUES (:proposal_id, :change_version)
+        ON DUPLICATE KEY UPDATE change_version = VALUES(change_version)
+        """
+        connection.execute(text(query), [{'proposal_id': proposal_id, 'change_version': version} for proposal_id in proposal_ids])
+    else:
+        connection.execute(
+            text("UPDATE student_infos SET change_version = :change_version WHERE proposal_id IN :proposal_ids")
+            .bindparams(sqlalchemy.bindparam("proposal_ids", expanding=True)),
+            {'change_version': version, 'proposal_ids': list(proposal_ids)}
+        )
+    return version
+
+def query_cache_stats():
+    """Returns the hit/miss/eviction counters of the query cache, see `ResultCache.stats`."""
+    return query_cache.stats()
 
 def execute_query(sql_query):
     """Executes a given SQL query using the connection pool."""
@@ -151,23 +318,32 @@ def initialize_session_state():
         'prof_submit': [],
         'prof_delete': [],
         'action_type':None,
-        'action_index': None
+        'action_index': None,
+        'bulk_action': None
     }
     for key, value in default_values.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
-def submit_proposal(proposal_data):
+def submit_proposal(proposal_data, copy_media_from=None):
+    """
+    Inserts a proposal.
+
+    Parameters:
+    - proposal_data (dict): The proposal, with the uploaded image bytes in `IMAGE_COLUMNS`.
+    - copy_media_from (str): A stored proposal whose images are copied to this one, in place of images absent
+      from `proposal_data`. They are copied by reference inside the database, without being downloaded.
+    """
     query = """
     INSERT INTO student_infos (
         name, project_name, mentor, github_link, objective, rationale, timeline, 
         contributors, semester, expected_students, mentor_email, dataset, approach, 
-        possible_issues, year, proposal_id, proposed_by_professor, status, objective_image, dataset_image, possible_issues_image
+        possible_issues, year, proposal_id, proposed_by_professor, status, objective_image_ref, dataset_image_ref, possible_issues_image_ref
     ) VALUES (
         :name, :project_name, :mentor, :github_link, :objective, 
         :rationale, :timeline, :contributors, :semester, :expected_students, 
         :mentor_email, :dataset, :approach, :possible_issues, :year, 
-        :proposal_id, :proposed_by_professor, :status , :objective_image, :dataset_image, :possible_issues_image
+        :proposal_id, :proposed_by_professor, :status , :objective_image_ref, :dataset_image_ref, :possible_issues_image_ref
     )
     """
 
@@ -176,8 +352,13 @@ def submit_proposal(proposal_data):
             # Prepare the statement using text() to ensure placeholders are handled correctly
             statement = text(query)
             # Execute the query with the dictionary of parameters
-            connection.execute(statement, proposal_data)
+            connection.execute(statement, dict(dict.fromkeys(MEDIA_REFERENCES.values()), **store_proposal_media(proposal_data)))
+            save_proposal_thumbnails(connection, proposal_data)
+            if copy_media_from is not None:
+                copy_proposal_media(connection, copy_media_from, proposal_data)
+            record_changes(connection, [proposal_data['proposal_id']])
             connection.commit()  # Commit the transaction
+        invalidate_proposal_cache(proposal_data['proposal_id'])
     except Exception as e:
         st.error(f"Error executing query: {e}")
     
@@ -188,12 +369,12 @@ def submit_prof_proposal(proposal_data):
     INSERT INTO student_infos (
         name, project_name, mentor, github_link, objective, rationale, timeline, 
         contributors, semester, expected_students, mentor_email, dataset, approach, 
-        possible_issues, year, proposal_id, proposed_by_professor, status, objective_image, dataset_image, possible_issues_image
+        possible_issues, year, proposal_id, proposed_by_professor, status, objective_image_ref, dataset_image_ref, possible_issues_image_ref
     ) VALUES (
         :name, :project_name, :mentor, :github_link, :objective, 
         :rationale, :timeline, :contributors, :semester, :expected_students, 
         :mentor_email, :dataset, :approach, :possible_issues, :year, 
-        :proposal_id, :proposed_by_professor, 'Professor Proposal', :objective_image, :dataset_image, :possible_issues_image
+        :proposal_id, :proposed_by_professor, 'Professor Proposal', :objective_image_ref, :dataset_image_ref, :possible_issues_image_ref
     )
     """
 
@@ -202,22 +383,195 @@ def submit_prof_proposal(proposal_data):
             # Prepare the statement using text() to ensure placeholders are handled correctly
             statement = text(query)
             # Execute the query with the dictionary of parameters
-            connection.execute(statement, proposal_data)
+            connection.execute(statement, dict(dict.fromkeys(MEDIA_REFERENCES.values()), **store_proposal_media(proposal_data)))
+            save_proposal_thumbnails(connection, proposal_data)
+            record_changes(connection, [proposal_data['proposal_id']])
             connection.commit()  # Commit the transaction
+        invalidate_proposal_cache(proposal_data['proposal_id'])
     except Exception as e:
         st.error(f"Error executing query: {e}")
 
 
+# Images uploaded with a proposal. The bytes are kept in the media store and referenced by the columns of
+# `MEDIA_REFERENCES`, the BLOB columns of the same name only hold the images of rows not migrated yet.
+IMAGE_COLUMNS = ["objective_image", "dataset_image", "possible_issues_image"]
+
+# Every other column of student_infos. List queries only select these, the images are loaded per proposal
+# with `fetch_proposal_images` by the pages that actually render them.
+LIST_COLUMNS = [
+    "proposal_id", "name", "project_name", "mentor", "github_link", "objective", "rationale", "timeline",
+    "contributors", "semester", "expected_students", "mentor_email", "dataset", "approach", "possible_issues",
+    "year", "proposed_by_professor", "status", "video_link", "project_website", "project_document"
+]
+LIST_COLUMNS_SQL = ", ".join(LIST_COLUMNS)
+
+# Field of a submitted proposal holding uploaded content -> student_infos column referencing it in the media
+# store. The image BLOB columns are only read for the rows written before the store, see migrate_media.py.
+MEDIA_REFERENCES = {
+    "objective_image": "objective_image_ref",
+    "dataset_image": "dataset_image_ref",
+    "possible_issues_image": "possible_issues_image_ref",
+    "project_document_data": "project_document_ref",
+}
+
+def store_proposal_media(proposal):
+    """
+    Uploads the images and document of a proposal about to be written to the media store.
+
+    Fields absent from `proposal` are left out of the parameters. A field set to None keeps the reference
+    passed with the proposal, if any, so that a proposal copied from a stored row keeps its images.
+
+    Parameters:
+    - proposal (dict): The proposal, with the uploaded bytes in the fields of `MEDIA_REFERENCES`.
+
+    Returns:
+    - dict: The parameters of the write: a copy of `proposal` holding the references, without the bytes.
+    """
+    params = dict(proposal)
+    for field, reference_column in MEDIA_REFERENCES.items():
+        if field not in params:
+            continue
+        data = params.pop(field)
+        if data is not None:
+            params[reference_column] = put_media(bytes(data))
+        else:
+            params.setdefault(reference_column, None)
+    return params
+
+# Columns written by `submit_completion` and `update_proposal_in_database`, when they hold a new value
+COMPLETION_UPDATE_COLUMNS = [
+    "project_name", "video_link", "github_link", "project_website", "project_document", "year", "semester", "name",
+    "mentor", "objective", "rationale", "timeline", "contributors", "expected_students", "mentor_email", "dataset",
+    "approach", "possible_issues", "status", "proposed_by_professor",
+    "objective_image_ref", "dataset_image_ref", "possible_issues_image_ref", "project_document_ref"
+]
+PROPOSAL_UPDATE_COLUMNS = [
+    column for column in COMPLETION_UPDATE_COLUMNS
+    if column not in ("video_link", "project_website", "project_document", "project_document_ref")
+]
+
+def update_changed_columns(connection, proposal, columns):
+    """
+    Updates only the columns of a stored proposal whose submitted value differs from the stored one.
+
+    The row is read and locked first, without its BLOBs. Callers leave the images that were not re-uploaded out
+    of `proposal`, so they are neither read nor written; an uploaded image is compared by its media store
+    reference, and only when it differs is its thumbnail rendered and its legacy BLOB cleared. Runs inside the
+    caller's transaction.
+
+    Parameters:
+    - connection (Connection): An open database connection.
+    - proposal (dict): The submitted proposal with its `proposal_id`. Columns absent from it are left as stored.
+    - columns (list of str): The columns the caller may write.
+
+    Returns:
+    - list of str: The columns updated, empty when nothing changed or the proposal does not exist.
+    """
+    submitted = {column: value for column, value in store_proposal_media(proposal).items() if column in columns}
+    if not submitted:
+        return []
+    stored = connection.execute(
+        text(f"SELECT {', '.join(submitted)} FROM student_infos WHERE proposal_id = :proposal_id FOR UPDATE"),
+        {'proposal_id': proposal['proposal_id']}
+    ).mappings().first()
+    if stored is None:
+        return []
+    changed = {column: value for column, value in submitted.items() if stored[column] != value}
+    if not changed:
+        return []
+    assignments = [f"{column} = :{column}" for column in changed]
+    changed_images = [column for column in IMAGE_COLUMNS if MEDIA_REFERENCES[column] in changed]
+    assignments += [f"{column} = NULL" for column in changed_images]
+    connection.execute(
+        text(f"UPDATE student_infos SET {', '.join(assignments)} WHERE proposal_id = :proposal_id"),
+        dict(changed, proposal_id=proposal['proposal_id'])
+    )
+    if changed_images:
+        save_proposal_thumbnails(connection, proposal, changed_images)
+    return list(changed)
+
+def copy_proposal_media(connection, source_id, proposal):
+    """
+    Copies the images of a stored proposal, and their thumbnails, to a proposal just inserted without them.
+
+    Only the references, legacy BLOBs and thumbnails are copied, by the database; nothing is downloaded.
+    Images provided with `proposal` are kept. Runs inside the caller's transaction.
+
+    Parameters:
+    - connection (Connection): The connection the proposal was inserted with.
+    - source_id (str): The proposal whose images are copied.
+    - proposal (dict): The inserted proposal.
+    """
+    columns = [column for column in IMAGE_COLUMNS if proposal.get(column) is None]
+    if not columns:
+        return
+    assignments = ", ".join(f"target.{column} = source.{column}, target.{MEDIA_REFERENCES[column]} = source.{MEDIA_REFERENCES[column]}"
+                            for column in columns)
+    params = {'source_id': source_id, 'target_id': proposal['proposal_id']}
+    connection.execute(text(f"""
+    UPDATE student_infos AS target, student_infos AS source SET {assignments}
+    WHERE target.proposal_id = :target_id AND source.proposal_id = :source_id
+    """), params)
+    query = """
+    INSERT INTO proposal_thumbnails (proposal_id, image_column, width, source_hash, thumbnail)
+    SELECT :target_id, image_column, width, source_hash, thumbnail
+    FROM proposal_thumbnails WHERE proposal_id = :source_id AND image_column IN :columns
+    ON DUPLICATE KEY UPDATE
+        width = VALUES(width),
+        source_hash = VALUES(source_hash),
+        thumbnail = VALUES(thumbnail)
+    """
+    connection.execute(text(query).bindparams(sqlalchemy.bindparam("columns", expanding=True)),
+                       dict(params, columns=columns))
+
+def resolve_proposal_media(rows):
+    """
+    Fills the image BLOB columns of proposal rows from the media store, for the images it holds.
+
+    Parameters:
+    - rows (list of dict): Rows holding the `IMAGE_COLUMNS` and their reference columns.
+
+    Returns:
+    - list of dict: The same rows, each image column holding its bytes or None when no image was uploaded.
+    """
+    references = [row[MEDIA_REFERENCES[column]] for row in rows for column in IMAGE_COLUMNS
+                  if row[column] is None and row[MEDIA_REFERENCES[column]]]
+    contents = get_many_media(references)
+    for row in rows:
+        for column in IMAGE_COLUMNS:
+            if row[column] is None and row[MEDIA_REFERENCES[column]]:
+                row[column] = contents[row[MEDIA_REFERENCES[column]]]
+    return rows
+
+def run_select(query, params=None):
+    """
+    Runs a SELECT statement against the database, bypassing the query cache.
+
+    Parameters:
+    - query (str or TextClause): The SQL query, with `:name` placeholders for its parameters.
+    - params (dict): Values for the placeholders, if any.
+
+    Returns:
+    - DataFrame: The rows returned by the query, with the result columns even when no row matched.
+    """
+    with engine.connect() as connection:
+        return select_frame(connection, query, params)
+
+def select_frame(connection, query, params=None):
+    """Runs a SELECT statement on an open connection, see `run_select`."""
+    statement = sqlalchemy.text(query) if isinstance(query, str) else query
+    result = connection.execute(statement, params or {})
+    # Ensuring column headers are transferred to the DataFrame
+    return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
 def fetch_data(query):
     """
     General purpose function to fetch data from the database.
+
+    Results are served from `query_cache` and dropped whenever a write touches student_infos.
     """
     try:
-        with engine.connect() as connection:
-            result = connection.execute(sqlalchemy.text(query))
-            df = pd.DataFrame(result.fetchall())
-            df.columns = result.keys()  # Ensuring column headers are transferred to the DataFrame
-            return df
+        return query_cache.get_or_load(('fetch_data', query), lambda: run_select(query), tags=(PROPOSALS_TAG,))
     except Exception as e:
         print(f"Error fetching data: {e}")
         return pd.DataFrame()
@@ -226,7 +580,7 @@ def fetch_proposals():
     """
     Fetches all proposals regardless of their status.
     """
-    query = "SELECT * FROM student_infos"
+    query = f"SELECT {LIST_COLUMNS_SQL} FROM student_infos"
     return fetch_data(query)
 
 
@@ -234,70 +588,398 @@ def fetch_pending_approval():
     """
     Fetches all approved proposals.
     """
-    query = "SELECT * FROM student_infos WHERE status = 'Pending Approval'"
+    query = f"SELECT {LIST_COLUMNS_SQL} FROM student_infos WHERE status = 'Pending Approval'"
     return fetch_data(query)
 
 def fetch_approved_proposals():
     """
     Fetches all approved proposals.
     """
-    query = "SELECT * FROM student_infos WHERE status = 'Approved.. In Progress'"
+    query = f"SELECT {LIST_COLUMNS_SQL} FROM student_infos WHERE status = 'Approved.. In Progress'"
     return fetch_data(query)
 
 def fetch_rejected_proposals():
     """
     Fetches all rejected proposals.
     """
-    query = "SELECT * FROM student_infos WHERE status = 'Rejected'"
+    query = f"SELECT {LIST_COLUMNS_SQL} FROM student_infos WHERE status = 'Rejected'"
     return fetch_data(query)
 
 def fetch_to_edit_proposals():
     """
     Fetches all proposals marked for editing.
     """
-    query = "SELECT * FROM student_infos WHERE status = 'Proposal to be edited'"
+    query = f"SELECT {LIST_COLUMNS_SQL} FROM student_infos WHERE status = 'Proposal to be edited'"
     return fetch_data(query)
 
 def fetch_prof_proposals():
     """
     Fetches proposals submitted by professors.
     """
-    query = "SELECT * FROM student_infos WHERE proposed_by_professor = True"
+    query = f"SELECT {LIST_COLUMNS_SQL} FROM student_infos WHERE proposed_by_professor = True"
     return fetch_data(query)
 
 def fetch_completions():
     """
     Fetches all completion forms.
     """
-    query = "SELECT * FROM student_infos where status='Completed'"
+    query = f"SELECT {LIST_COLUMNS_SQL} FROM student_infos where status='Completed'"
     return fetch_data(query)
 
 def fetch_pending_completions():
     """
     Fetches all completion forms marked for editing.
     """
-    query = "SELECT * FROM student_infos WHERE status = 'Pending Completion'"
+    query = f"SELECT {LIST_COLUMNS_SQL} FROM student_infos WHERE status = 'Pending Completion'"
     return fetch_data(query)
 
 def fetch_approved_completions():
     """
     Fetches all completed forms that have been approved.
     """
-    query = "SELECT * FROM student_infos WHERE status = 'Completed'"
+    query = f"SELECT {LIST_COLUMNS_SQL} FROM student_infos WHERE status = 'Completed'"
     return fetch_data(query)
 
+# Seconds during which the change version is not checked again. Writes made by this process reset it, so only
+# the changes of other server processes can take that long to show up.
+CHANGE_CHECK_SECONDS = float(os.getenv('CHANGE_CHECK_SECONDS', 1))
+
+# Change version of student_infos the cached reads of this process are up to date with, and when it was last checked
+_change_version = None
+_change_checked_at = 0
+_change_lock = threading.Lock()
+
+def sync_changes():
+    """
+    Drops the cached reads of the proposals written by other server processes, using the change feed.
+
+    A call reads the current change version, a single-row query, and only when it moved reads the IDs of the
+    proposals written or deleted since the last version seen. The version and the IDs are read in one
+    transaction so that they are consistent.
+    """
+    global _change_version, _change_checked_at
+    with _change_lock:
+        if time.monotonic() - _change_checked_at < CHANGE_CHECK_SECONDS:
+            return
+        try:
+            with engine.connect() as connection:
+                version = connection.execute(text("SELECT version FROM change_sequence WHERE id = 1")).scalar()
+                if _change_version is not None and version != _change_version:
+                    params = {'version': _change_version}
+                    rows = select_frame(connection, "SELECT proposal_id FROM student_infos WHERE change_version > :version", params)
+                    deleted = select_frame(connection, "SELECT proposal_id FROM student_infos_deletions WHERE change_version > :version", params)
+                    changed = set(rows['proposal_id']) | set(deleted['proposal_id'])
+                    query_cache.invalidate(PROPOSALS_TAG, *[proposal_tag(proposal_id) for proposal_id in changed])
+            _change_version = version
+            _change_checked_at = time.monotonic()
+        except Exception as e:
+            print(f"Error reading the change feed: {e}")
+
+# Row conditions of every status view shown in the app, used to filter and paginate in the database
+VIEW_CONDITIONS = {
+    'approved': "status = 'Approved.. In Progress'",
+    'rejected': "status = 'Rejected'",
+    'to_edit': "status = 'Proposal to be edited'",
+    'prof': "proposed_by_professor = True",
+    'pending_completion': "status = 'Pending Completion'",
+    'completed': "status = 'Completed'",
+    'pending_approval': "status = 'Pending Approval'",
+}
+VIEW_CONDITIONS['all'] = " OR ".join(f"({condition})" for condition in VIEW_CONDITIONS.values())
+
+# Columns the sidebar can filter on with a multiselect
+FILTER_COLUMNS = ["project_name", "year", "semester", "name"]
+
+# Rows shown per page by the paginated views
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', 25))
+
+def build_filter_clause(view, filters):
+    """
+    Compiles a view and the sidebar filters into a parameterized WHERE clause.
+
+    Parameters:
+    - view (str): A key of `VIEW_CONDITIONS`.
+    - filters (dict): Lists of selected values keyed by `FILTER_COLUMNS`, and an optional 'proposal_id' string.
+      Empty selections do not filter.
+
+    Returns:
+    - tuple: The WHERE clause (without the keyword) and the dict of its parameters.
+    """
+    conditions = [f"({VIEW_CONDITIONS[view]})"]
+    params = {}
+    for column in FILTER_COLUMNS:
+        values = filters.get(column) or []
+        if values:
+            names = [f"{column}_{i}" for i in range(len(values))]
+            conditions.append(f"{column} IN ({', '.join(':' + name for name in names)})")
+            params.update(zip(names, values))
+    if filters.get('proposal_id'):
+        conditions.append("proposal_id = :proposal_id")
+        params['proposal_id'] = filters['proposal_id']
+    return " AND ".join(conditions), params
+
+def _cached_select(query, params):
+    """Runs a SELECT through `query_cache`, returning an empty DataFrame if it fails."""
+    key = ('select', query, tuple(sorted(params.items())))
+    try:
+        return query_cache.get_or_load(key, lambda: run_select(query, params), tags=(PROPOSALS_TAG,))
+    except Exception as e:
+        print(f"Error fetching data: {e}")
+        return pd.DataFrame()
+
+def count_filtered(view, filters):
+    """
+    Counts the rows of a view matching the sidebar filters.
+
+    Parameters:
+    - view (str): A key of `VIEW_CONDITIONS`.
+    - filters (dict): The filters returned by the sidebar, see `build_filter_clause`.
+
+    Returns:
+    - int: The number of matching rows.
+    """
+    where, params = build_filter_clause(view, filters)
+    df = _cached_select(f"SELECT COUNT(*) AS total FROM student_infos WHERE {where}", params)
+    return 0 if df.empty else int(df['total'][0])
+
+def fetch_filtered_page(view, filters, page=1, page_size=None, columns=None):
+    """
+    Fetches one page of a view with the sidebar filters applied by the database.
+
+    Parameters:
+    - view (str): A key of `VIEW_CONDITIONS`.
+    - filters (dict): The filters returned by the sidebar, see `build_filter_clause`.
+    - page (int): The 1-based page number.
+    - page_size (int): Rows per page. None fetches every matching row.
+    - columns (list of str): Columns to select, `LIST_COLUMNS` by default.
+
+    Returns:
+    - DataFrame: The rows of the page, ordered by proposal_id and indexed by their position in the whole view.
+    """
+    where, params = build_filter_clause(view, filters)
+    query = f"SELECT {', '.join(columns or LIST_COLUMNS)} FROM student_infos WHERE {where} ORDER BY proposal_id"
+    offset = 0
+    if page_size:
+        offset = (page - 1) * page_size
+        query += " LIMIT :limit OFFSET :offset"
+        params = dict(params, limit=page_size, offset=offset)
+    df = _cached_select(query, params)
+    if not df.empty:
+        df = df.set_axis(pd.RangeIndex(offset, offset + len(df)))
+    return df
+
+def fetch_filter_options():
+    """
+    Fetches the values offered by the sidebar filters, with one cached `SELECT DISTINCT` per column.
+
+    It runs at the start of every rerun, so it also applies the changes of other server processes to
+    `query_cache` first, see `sync_changes`.
+
+    Returns:
+    - dict: The distinct values of every `FILTER_COLUMNS` column across all the views.
+    """
+    sync_changes()
+    options = {}
+    for column in FILTER_COLUMNS:
+        df = _cached_select(f"SELECT DISTINCT {column} FROM student_infos WHERE {VIEW_CONDITIONS['all']} ORDER BY {column}", {})
+        options[column] = df[column].tolist() if column in df.columns else []
+    return options
+
+def fetch_paginated(view, filters, key, page_size=PAGE_SIZE):
+    """
+    Shows page controls for a view and fetches the page the user selected.
+
+    Only the rows of that page are read from the database.
+
+    Parameters:
+    - view (str): A key of `VIEW_CONDITIONS`.
+    - filters (dict): The filters returned by the sidebar, see `build_filter_clause`.
+    - key (str): Unique key for the page widget.
+    - page_size (int): Rows per page.
+
+    Returns:
+    - DataFrame: The rows of the selected page.
+    """
+    total = count_filtered(view, filters)
+    pages = max(1, -(-total // page_size))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (1-{pages}, {total} records)", min_value=1, max_value=pages, value=1, step=1, key=f"page_{key}")
+    return fetch_filtered_page(view, filters, page, page_size)
+
+def fetch_proposal_images(proposal_ids):
+    """
+    Fetches the images of the given proposals, from the media store or, for the rows written before it, their BLOBs.
+
+    Images already in `query_cache` are reused; the others are read with a single `IN (...)` query and cached
+    per proposal until that proposal is written to.
+
+    Parameters:
+    - proposal_ids (list of str): The proposals whose images are needed.
+
+    Returns:
+    - dict: Maps each proposal ID to a dict of its `IMAGE_COLUMNS` (None when not uploaded).
+
+    Raises:
+    - Exception: When the database or the media store cannot be read, so that a failure is never mistaken
+      for images that were not uploaded.
+    """
+    query = sqlalchemy.text(
+        "SELECT proposal_id, objective_image, dataset_image, possible_issues_image, "
+        "objective_image_ref, dataset_image_ref, possible_issues_image_ref "
+        "FROM student_infos WHERE proposal_id IN :proposal_ids"
+    ).bindparams(sqlalchemy.bindparam("proposal_ids", expanding=True))
+
+    def load(keys):
+        df = run_select(query, {'proposal_ids': [proposal_id for _, proposal_id in keys]})
+        rows = resolve_proposal_media(df.to_dict('records'))
+        found = {row['proposal_id']: {column: row[column] for column in IMAGE_COLUMNS} for row in rows}
+        return {key: found.get(key[1], dict.fromkeys(IMAGE_COLUMNS)) for key in keys}
+
+    keys = [('proposal_images', proposal_id) for proposal_id in proposal_ids]
+    images = query_cache.get_many_or_load(keys, load, tags=lambda key: (proposal_tag(key[1]),))
+    return {key[1]: images.get(key, dict.fromkeys(IMAGE_COLUMNS)) for key in keys}
+
+# Width in pixels of the thumbnails stored in proposal_thumbnails
+THUMBNAIL_WIDTH = 300
+
+# Side table holding, for every image column of a proposal, the ready-made thumbnail shown by the pages.
+# A row with a NULL thumbnail records that no image was uploaded; a missing row means the proposal was not
+# processed yet (see backfill_thumbnails.py) and the original BLOB has to be read instead. The table is
+# created by the migrations.
+
+def build_thumbnail_rows(proposal, columns=None):
+    """
+    Renders the thumbnails of the image columns of a proposal.
+
+    Parameters:
+    - proposal (dict): A proposal holding `proposal_id` and the image BLOBs in `IMAGE_COLUMNS`.
+    - columns (list of str): The image columns to render, all of `IMAGE_COLUMNS` by default.
+
+    Returns:
+    - list of dict: One proposal_thumbnails row per image column. Images that cannot be decoded are left out
+      so that the pages keep falling back to the original BLOB for them.
+    """
+    rows = []
+    for column in columns or IMAGE_COLUMNS:
+        blob_data = proposal.get(column)
+        row = {'proposal_id': proposal['proposal_id'], 'image_column': column, 'width': THUMBNAIL_WIDTH,
+               'source_hash': None, 'thumbnail': None}
+        if blob_data is not None:
+            try:
+                row['thumbnail'] = get_thumbnail(blob_data, THUMBNAIL_WIDTH)
+            except Exception as e:
+                print(f"Error creating thumbnail for {proposal['proposal_id']} {column}: {e}")
+                continue
+            row['source_hash'] = image_content_hash(blob_data)
+        rows.append(row)
+    return rows
+
+def save_proposal_thumbnails(connection, proposal, columns=None):
+    """
+    Writes the thumbnails of a proposal alongside it, inside the caller's transaction.
+
+    Parameters:
+    - connection (Connection): The connection the proposal itself is being written with.
+    - proposal (dict): The proposal that is being inserted or updated, including its image BLOBs.
+    - columns (list of str): The image columns whose thumbnails are written, by default the `IMAGE_COLUMNS`
+      present in `proposal`.
+
+    Returns:
+    - list of dict: The rows written, see `build_thumbnail_rows`.
+    """
+    columns = columns or [column for column in IMAGE_COLUMNS if column in proposal]
+    if not columns:
+        return []
+    rows = build_thumbnail_rows(proposal, columns)
+    if not rows:
+        return rows
+    query = """
+    INSERT INTO proposal_thumbnails (proposal_id, image_column, width, source_hash, thumbnail)
+    VALUES (:proposal_id, :image_column, :width, :source_hash, :thumbnail)
+    ON DUPLICATE KEY UPDATE
+        width = VALUES(width),
+        source_hash = VALUES(source_hash),
+        thumbnail = VALUES(thumbnail)
+    """
+    connection.execute(text(query), rows)
+    return rows
+
+def fetch_proposal_thumbnails(proposal_ids):
+    """
+    Fetches the stored thumbnails of the given proposals with a single query, cached per proposal.
+
+    Parameters:
+    - proposal_ids (list of str): The proposals whose thumbnails are needed.
+
+    Returns:
+    - dict: Maps each proposal ID to a dict from image column to its thumbnail data URI (None when no image
+      was uploaded). Image columns that were never processed are absent.
+    """
+    query = sqlalchemy.text(
+        "SELECT proposal_id, image_column, thumbnail FROM proposal_thumbnails WHERE proposal_id IN :proposal_ids"
+    ).bindparams(sqlalchemy.bindparam("proposal_ids", expanding=True))
+
+    def load(keys):
+        df = run_select(query, {'proposal_ids': [proposal_id for _, proposal_id in keys]})
+        found = {key: {} for key in keys}
+        for row in df.to_dict('records'):
+            found[('proposal_thumbnails', row['proposal_id'])][row['image_column']] = row['thumbnail']
+        return found
+
+    keys = [('proposal_thumbnails', proposal_id) for proposal_id in proposal_ids]
+    try:
+        thumbnails = query_cache.get_many_or_load(keys, load, tags=lambda key: (proposal_tag(key[1]),))
+    except Exception as e:
+        print(f"Error fetching proposal thumbnails: {e}")
+        thumbnails = {}
+    return {key[1]: thumbnails.get(key, {}) for key in keys}
+
+def attach_proposal_images(df):
+    """
+    Adds what the pages need to render the images to a frame of proposals loaded without them.
+
+    The stored thumbnails are added as `<image column>_thumbnail` columns. The original BLOBs are only read
+    for proposals with image columns missing from proposal_thumbnails, every other BLOB column is left None.
+
+    Parameters:
+    - df (DataFrame): Proposals selected with `LIST_COLUMNS`.
+
+    Returns:
+    - DataFrame: A copy of `df` with the `IMAGE_COLUMNS` and their thumbnail columns filled in.
+    """
+    if df.empty:
+        return df
+    proposal_ids = df['proposal_id'].tolist()
+    thumbnails = fetch_proposal_thumbnails(proposal_ids)
+    unprocessed = [proposal_id for proposal_id in proposal_ids
+                   if any(column not in thumbnails[proposal_id] for column in IMAGE_COLUMNS)]
+    images = {}
+    if unprocessed:
+        try:
+            images = fetch_proposal_images(unprocessed)
+        except Exception as e:
+            print(f"Error fetching proposal images: {e}")
+            st.warning("Some images could not be loaded.")
+    columns = {}
+    for column in IMAGE_COLUMNS:
+        columns[column] = [images.get(proposal_id, {}).get(column) for proposal_id in proposal_ids]
+        columns[f"{column}_thumbnail"] = [thumbnails[proposal_id].get(column) for proposal_id in proposal_ids]
+    return df.assign(**columns)
+
 def fetch_project_details(proposal_id):
     """
-    Fetches project details for a given proposal ID.
+    Fetches project details for a given proposal ID, without the images.
     """
-    query = "SELECT * FROM student_infos WHERE proposal_id = :proposal_id and status = 'Approved.. In Progress'"
+    query = f"SELECT {LIST_COLUMNS_SQL} FROM student_infos WHERE proposal_id = :proposal_id and status = 'Approved.. In Progress'"
     try:
-        with engine.connect() as connection:
-            result = connection.execute(sqlalchemy.text(query), {'proposal_id': proposal_id})
-            df = pd.DataFrame(result.fetchall())
-            df.columns = result.keys()  # Ensuring column headers are transferred to the DataFrame
-            st.write(df)
-            return df 
+        df = query_cache.get_or_load(
+            ('fetch_project_details', proposal_id),
+            lambda: run_select(query, {'proposal_id': proposal_id}),
+            tags=(proposal_tag(proposal_id),)
+        )
+        st.write(df)
+        return df 
     except Exception as e:
         print(f"Error fetching project details: {e}")
         return None
@@ -309,7 +991,9 @@ def update_proposal_status(proposal_id, status):
         with engine.connect() as connection:
             
             connection.execute(text(query), {'status': status, 'proposal_id': proposal_id})
+            record_changes(connection, [proposal_id])
             connection.commit()  # Commit explicitly
+            invalidate_proposal_cache(proposal_id)
             st.success(f"Proposal status updated to {status}.")
     except Exception as e:
         print(f"Error updating proposal status: {e}")
@@ -324,7 +1008,10 @@ def delete_proposal(proposal_id):
     try:
         with engine.connect() as connection:
             connection.execute(text(query), {'proposal_id': proposal_id})
+            connection.execute(text("DELETE FROM proposal_thumbnails WHERE proposal_id = :proposal_id"), {'proposal_id': proposal_id})
+            record_changes(connection, [proposal_id], deleted=True)
             connection.commit()
+            invalidate_proposal_cache(proposal_id)
             st.success("Proposal deleted successfully.")
     except Exception as e:
         print(f"Error deleting proposal: {e}")
@@ -339,7 +1026,9 @@ def approve_proposal(proposal_id):
     try:
         with engine.connect() as connection:
             connection.execute(text(query), {'status': "Approved.. In Progress", 'proposal_id': proposal_id})
+            record_changes(connection, [proposal_id])
             connection.commit()
+            invalidate_proposal_cache(proposal_id)
             st.success("Proposal approved successfully.")
             st.experimental_rerun()  # Assuming use of Streamlit's experimental rerun function
     except Exception as e:
@@ -363,7 +1052,9 @@ def reject_proposal(proposal_id):
     try:
         with engine.connect() as connection:
             connection.execute(text(query), {'status': "Rejected", 'proposal_id': proposal_id})
+            record_changes(connection, [proposal_id])
             connection.commit()
+            invalidate_proposal_cache(proposal_id)
             st.success("Proposal rejected successfully.")
             st.experimental_rerun()  # Assuming use of Streamlit's experimental rerun function
     except Exception as e:
@@ -388,7 +1079,9 @@ def edit_proposal(proposal_id):
     try:
         with engine.connect() as connection:
             connection.execute(text(query), {'status': "Proposal to be edited", 'proposal_id': proposal_id})
+            record_changes(connection, [proposal_id])
             connection.commit()
+            invalidate_proposal_cache(proposal_id)
             st.success("Proposal sent to editing.")
             st.experimental_rerun()  # Assuming use of Streamlit's experimental rerun function
     except Exception as e:
@@ -396,43 +1089,126 @@ def edit_proposal(proposal_id):
         st.error("Failed to send it to edit proposal.")
 
 
+# Status set by each bulk action, 'delete' removes the proposals instead
+BULK_ACTION_STATUSES = {
+    'approve': "Approved.. In Progress",
+    'reject': "Rejected",
+    'edit': "Proposal to be edited",
+}
+BULK_ACTION_LABELS = {'approve': "Approve", 'reject': "Reject", 'edit': "Send to editing", 'delete': "Delete"}
+
+def apply_bulk_action(action, proposal_ids):
+    """
+    Applies one action to many proposals in a single transaction.
+
+    Parameters:
+    - action (str): 'approve', 'reject', 'edit' or 'delete'.
+    - proposal_ids (list of str): The proposals to act on.
+
+    Returns:
+    - int: The number of proposals updated or deleted.
+    """
+    ids_param = sqlalchemy.bindparam("proposal_ids", expanding=True)
+    with engine.connect() as connection:
+        if action == 'delete':
+            result = connection.execute(
+                text("DELETE FROM student_infos WHERE proposal_id IN :proposal_ids").bindparams(ids_param),
+                {'proposal_ids': proposal_ids}
+            )
+            connection.execute(
+                text("DELETE FROM proposal_thumbnails WHERE proposal_id IN :proposal_ids").bindparams(ids_param),
+                {'proposal_ids': proposal_ids}
+            )
+        else:
+            result = connection.execute(
+                text("UPDATE student_infos SET status = :status WHERE proposal_id IN :proposal_ids").bindparams(ids_param),
+                {'status': BULK_ACTION_STATUSES[action], 'proposal_ids': proposal_ids}
+            )
+        record_changes(connection, proposal_ids, deleted=action == 'delete')
+        connection.commit()
+    invalidate_proposals_cache(proposal_ids)
+    return result.rowcount
+
+def select_proposals(proposals, key):
+    """
+    Lets the user pick several of the proposals shown on the page.
+
+    Parameters:
+    - proposals (list of dict): The proposals displayed, with their proposal_id and project_name.
+    - key (str): Unique key of the widgets.
+
+    Returns:
+    - list of str: The IDs of the selected proposals.
+    """
+    labels = {proposal['proposal_id']: f"{proposal['project_name']} ({proposal['proposal_id']})" for proposal in proposals}
+    if st.checkbox("Select every proposal on this page", key=f"select_all_{key}"):
+        return list(labels)
+    return st.multiselect("Select proposals", options=list(labels), format_func=labels.get, key=f"select_{key}")
+
+def bulk_action_buttons(proposal_ids, actions, key):
+    """
+    Shows one button per action applying it to the selected proposals. The action is only stored in the
+    session state, `check_bulk_action_and_prompt_password` asks for the password and runs it.
+
+    Parameters:
+    - proposal_ids (list of str): The selected proposals.
+    - actions (list of str): Keys of `BULK_ACTION_LABELS`.
+    - key (str): Unique key of the widgets, the prompt is shown by the section using the same key.
+    """
+    columns = st.columns(len(actions))
+    for column, action in zip(columns, actions):
+        with column:
+            if st.button(f"{BULK_ACTION_LABELS[action]} selected ({len(proposal_ids)})", key=f"bulk_{action}_{key}",
+                         disabled=not proposal_ids):
+                st.session_state['bulk_action'] = {'action': action, 'proposal_ids': list(proposal_ids), 'key': key}
+
+def check_bulk_action_and_prompt_password(key):
+    """
+    Asks once for the password of the bulk action requested from the section `key` and applies it.
+
+    Parameters:
+    - key (str): The key the action was requested with, see `bulk_action_buttons`.
+    """
+    request = st.session_state.get('bulk_action')
+    if not request or request['key'] != key:
+        return
+    action, proposal_ids = request['action'], request['proposal_ids']
+    st.warning(f"{BULK_ACTION_LABELS[action]} {len(proposal_ids)} proposals?")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        password = st.text_input("Enter password to proceed with the action:", type="password", key=f"password_bulk_{key}")
+    with col2:
+        if st.button("Cancel", key=f"cancel_bulk_{key}"):
+            st.session_state['bulk_action'] = None
+            st.rerun()
+    if password:
+        if password == PASSWORD:
+            try:
+                count = apply_bulk_action(action, proposal_ids)
+            except Exception as e:
+                print(f"Error applying {action} to {len(proposal_ids)} proposals: {e}")
+                st.error(f"Failed to {BULK_ACTION_LABELS[action].lower()} the proposals, none was changed.")
+                return
+            st.session_state['bulk_action'] = None
+            st.success(f"{BULK_ACTION_LABELS[action]}: {count} proposals updated.")
+            st.rerun()
+        else:
+            st.error("Incorrect password.")
+
+
 
 def submit_completion(completion):
     """
     Updates the completion details for a given proposal in the student_info table.
+
+    Only the columns whose value changed are written, see `update_changed_columns`.
     """
-    query = """
-    UPDATE student_infos SET
-        project_name = :project_name,
-        video_link = :video_link,
-        github_link = :github_link,
-        project_website = :project_website,
-        project_document = :project_document,
-        year = :year,
-        semester = :semester,
-        name = :name,
-        mentor = :mentor,
-        objective = :objective,
-        rationale = :rationale,
-        timeline = :timeline,
-        contributors = :contributors,
-        expected_students = :expected_students,
-        mentor_email = :mentor_email,
-        dataset = :dataset,
-        approach = :approach,
-        possible_issues = :possible_issues,
-        status = 'Completed',
-        proposed_by_professor = :proposed_by_professor,
-        objective_image = :objective_image,
-        dataset_image = :dataset_image,
-        possible_issues_image = :possible_issues_image
-    WHERE proposal_id = :proposal_id;
-    """
-  
     try:
         with engine.connect() as connection:
-            connection.execute(text(query), completion)  # Passing the completion dict directly
+            if update_changed_columns(connection, dict(completion, status='Completed'), COMPLETION_UPDATE_COLUMNS):
+                record_changes(connection, [completion['proposal_id']])
             connection.commit()
+            invalidate_proposal_cache(completion['proposal_id'])
             st.success("Completion details updated successfully!")
     except Exception as e:
         st.error(f"Error updating completion details: {e}")
@@ -462,7 +1238,7 @@ def show_prof_proposals(session):
     - If an edit is triggered, a detailed form is provided to edit and resubmit the proposal with new data.
     """
 
-    matching_proposals = pd.DataFrame(session)
+    matching_proposals = attach_proposal_images(pd.DataFrame(session))
 
     # st.write(matching_proposals)
     if not matching_proposals.empty:
@@ -477,10 +1253,10 @@ def show_prof_proposals(session):
                     st.write(f"**Project Name:** {proposal['project_name']}")
                     st.write(f"**Mentor:** {proposal['mentor']}")
                     st.write(f"**Objective:** {proposal['objective']}")
-                    st.write(f"**objective Image:** {handle_image_markdown(proposal['objective_image'])}")
+                    st.write(f"**objective Image:** {handle_image_markdown(proposal['objective_image'], proposal['objective_image_thumbnail'])}")
                     st.write(f"**Rationale:** {proposal['rationale']}")
                     st.write(f"**Dataset:** {proposal['dataset']}")
-                    st.write(f"**Dataset Image:** {handle_image_markdown(proposal['dataset_image'])}")
+                    st.write(f"**Dataset Image:** {handle_image_markdown(proposal['dataset_image'], proposal['dataset_image_thumbnail'])}")
                     
                     st.write(f"**Timeline:** {proposal['timeline']}")
                     st.write(f"**Contributors:** {proposal['contributors']}")
@@ -492,7 +1268,7 @@ def show_prof_proposals(session):
                     st.write(f"**Mentor Email:** {proposal['mentor_email']}")
                     st.write(f"**Approach:** {proposal['approach']}")
                     st.write(f"**Possible Issues:** {proposal['possible_issues']}")
-                    st.write(f"**Possible Issues Image:** {handle_image_markdown(proposal['possible_issues_image'])}")
+                    st.write(f"**Possible Issues Image:** {handle_image_markdown(proposal['possible_issues_image'], proposal['possible_issues_image_thumbnail'])}")
                     
                     st.write(f"**GitHub Link:** {proposal['github_link']}")
                     st.write(f"**Year:** {proposal['year']}")
@@ -530,9 +1306,6 @@ def show_prof_proposals(session):
                         rationale = st.text_area("Rationale",value=matching_proposals.loc[index,"rationale"])
                         timeline = st.text_area("Timeline",value=matching_proposals.loc[index,"timeline"])
                         contributors = st.text_input("Contributors",value=matching_proposals.loc[index,"contributors"])
-                        objective_image = matching_proposals.loc[index,"objective_image"]
-                        dataset_image = matching_proposals.loc[index,"dataset_image"] 
-                        possible_issues_image = matching_proposals.loc[index,"possible_issues_image"] 
 
                     with right_col:
                         semester = st.selectbox("Semester", options=["Spring", "Summer", "Fall"])
@@ -565,13 +1338,10 @@ def show_prof_proposals(session):
                             "year": year,
                             "proposal_id": new_id,
                             "status" : "Pending Approval",
-                            "proposed_by_professor": False,
-                            "objective_image":objective_image,
-                            "dataset_image" :dataset_image,
-                            "possible_issues_image": possible_issues_image
-                        
+                            "proposed_by_professor": False
                         }
-                        submit_proposal(proposal_data_edit)
+                        # The images are copied by reference from the professor's proposal
+                        submit_proposal(proposal_data_edit, copy_media_from=matching_proposals.loc[index,"proposal_id"])
                         # Update the appropriate proposal in the session state
                         # st.session_state['to_edit_proposal'][index].append(proposal_data_edit)
                         # Reset flags to hide the form
@@ -585,35 +1355,13 @@ def show_prof_proposals(session):
                         # st.rerun() 
 
 def update_proposal_in_database(proposal):
-    """Updates proposal details in the database using SQLAlchemy."""
-    query = """
-    UPDATE student_infos SET
-        project_name = :project_name,
-        github_link = :github_link,
-        year = :year,
-        semester = :semester,
-        name = :name,
-        mentor = :mentor,
-        objective = :objective,
-        rationale = :rationale,
-        timeline = :timeline,
-        contributors = :contributors,
-        expected_students = :expected_students,
-        mentor_email = :mentor_email,
-        dataset = :dataset,
-        approach = :approach,
-        possible_issues = :possible_issues,
-        status = :status,
-        proposed_by_professor = :proposed_by_professor,
-        objective_image = :objective_image,
-        dataset_image = :dataset_image,
-        possible_issues_image = :possible_issues_image
-    WHERE proposal_id = :proposal_id;
-    """
+    """Updates the proposal columns whose value changed, see `update_changed_columns`."""
     try:
         with engine.connect() as connection:
-            connection.execute(text(query), proposal)  # Directly using proposal dict
+            if update_changed_columns(connection, proposal, PROPOSAL_UPDATE_COLUMNS):
+                record_changes(connection, [proposal['proposal_id']])
             connection.commit()
+            invalidate_proposal_cache(proposal['proposal_id'])
             st.success("Proposal details updated successfully!")
     except Exception as e:
         st.error(f"Error updating proposal details: {e}")
@@ -624,7 +1372,7 @@ def show_to_edit_proposals(data):
 
     if proposal_id_to_edit:
         # Filter DataFrame for the matching proposal ID
-        proposal_details = data[data['proposal_id'] == proposal_id_to_edit]
+        proposal_details = attach_proposal_images(data[data['proposal_id'] == proposal_id_to_edit])
 
         
         if not proposal_details.empty:
@@ -640,11 +1388,11 @@ def show_to_edit_proposals(data):
                             st.write(f"**Project Name:** {proposal['project_name']}")
                             st.write(f"**Mentor:** {proposal['mentor']}")
                             st.write(f"**Objective:** {proposal['objective']}")
-                            st.write(f"**Objective Image:** {handle_image_markdown(proposal['objective_image'])}")
+                            st.write(f"**Objective Image:** {handle_image_markdown(proposal['objective_image'], proposal['objective_image_thumbnail'])}")
                             
                             st.write(f"**Rationale:** {proposal['rationale']}")
                             st.write(f"**Dataset:** {proposal['dataset']}")
-                            st.write(f"**Dataset Image:** {handle_image_markdown(proposal['dataset_image'])}")
+                            st.write(f"**Dataset Image:** {handle_image_markdown(proposal['dataset_image'], proposal['dataset_image_thumbnail'])}")
                             
             
                             st.write(f"**Timeline:** {proposal['timeline']}")
@@ -657,7 +1405,7 @@ def show_to_edit_proposals(data):
                             st.write(f"**Mentor Email:** {proposal['mentor_email']}")
                             st.write(f"**Approach:** {proposal['approach']}")
                             st.write(f"**Possible Issues:** {proposal['possible_issues']}")
-                            st.write(f"**Possible Issues Image:** {handle_image_markdown(proposal['possible_issues_image'])}")
+                            st.write(f"**Possible Issues Image:** {handle_image_markdown(proposal['possible_issues_image'], proposal['possible_issues_image_thumbnail'])}")
                             
                             st.write(f"**GitHub Link:** {proposal['github_link']}")
                             st.write(f"**Year:** {proposal['year']}")
@@ -690,24 +1438,10 @@ def show_to_edit_proposals(data):
                             contributors = st.text_input("Contributors",value=proposal_details.loc[index,"contributors"])
                             status = proposal_details.loc[index,"status"]
                             proposed_by_professor = proposal_details.loc[index,"proposed_by_professor"]
-                            objective_image_prev = proposal_details.loc[index,"objective_image"]
+                            # The stored images are kept unless new ones are uploaded
                             objective_image = st.file_uploader("Upload an image for objective if needed", type=["jpg", "jpeg", "png"],key="objective_image")
-                            if objective_image:
-                                objective_image_binary = convert_image_to_binary(objective_image) 
-                            else:
-                                objective_image_binary = objective_image_prev
-                            dataset_image_prev = proposal_details.loc[index,"dataset_image"]
                             dataset_image = st.file_uploader("Upload an image for dataset", type=["jpg", "jpeg", "png"], key="dataset_image")
-                            if dataset_image:
-                                dataset_image_binary = convert_image_to_binary(dataset_image)
-                            else:
-                                dataset_image_binary = dataset_image_prev
-                            possible_issues_image_prev = proposal_details.loc[index,"possible_issues"]
                             possible_issues_image = st.file_uploader("Upload an image for possible issues", type=["jpg", "jpeg", "png"],key="possible_issues_image")
-                            if possible_issues_image:
-                                possible_issues_image_binary = convert_image_to_binary(possible_issues_image)
-                            else:
-                                possible_issues_image_binary = possible_issues_image_prev
 
 
                         with right_col:
@@ -740,11 +1474,12 @@ def show_to_edit_proposals(data):
                                 "year": year,
                                 "proposal_id": proposal_id,
                                 "status" : "Pending Approval",
-                                "proposed_by_professor": proposed_by_professor,
-                                "objective_image":objective_image_binary,
-                                "dataset_image" :dataset_image_binary,
-                                "possible_issues_image": possible_issues_image_binary
+                                "proposed_by_professor": proposed_by_professor
                             }
+                            # Only the uploaded images are written, update_proposal_in_database leaves the others as stored
+                            for column, uploaded_image in zip(IMAGE_COLUMNS, [objective_image, dataset_image, possible_issues_image]):
+                                if uploaded_image:
+                                    proposal_data_edit[column] = convert_image_to_binary(uploaded_image)
                             update_proposal_in_database(proposal_data_edit)
                             # # Updating the appropriate proposal in the session state
                             # st.session_state.to_edit_proposal[index] = proposal_data_edit
@@ -1018,7 +1753,6 @@ def generate_markdown_file(markdown_content):
     return bytes_io
 
 def display_section(df, section_name,section_key):
-    st.header(section_name)
     if "action_type_del" not in st.session_state:
             st.session_state["action_type_del"] = None
     if "action_index_del" not in st.session_state:
@@ -1028,22 +1762,30 @@ def display_section(df, section_name,section_key):
         st.write("No Proposals to show in this section.")
         return
 
-    for index, row in df.iterrows():
-        proposal_markdown = format_proposal_as_markdown(row.to_dict())
-        markdown_file = generate_markdown_file(proposal_markdown)
+    selected = select_proposals(df[['proposal_id', 'project_name']].to_dict('records'), key=section_key)
+    bulk_action_buttons(selected, ['delete'], key=section_key)
+    check_bulk_action_and_prompt_password(section_key)
 
+    for index, row in df.iterrows():
+        # Only a summary is sent for every proposal, its document and images are rendered once it is opened
         with st.expander(f"{row['project_name']} (Details)"):
-            st.markdown(proposal_markdown, unsafe_allow_html=True)
+            st.write(f"**Name:** {row['name']} | **Semester:** {row['semester']} {row['year']} | **Status:** {row['status']}")
             download_button_key = f"download_{section_name}_{index}"
             delete_button_key = f"delete_{section_name}_{index}"
-            
+            proposal_markdown = None
+            if st.toggle("Show proposal", key=f"details_{section_name}_{row['proposal_id']}"):
+                proposal = attach_proposal_images(df.loc[[index]]).iloc[0].to_dict()
+                proposal_markdown = format_proposal_as_markdown(proposal)
+                st.markdown(proposal_markdown, unsafe_allow_html=True)
+
             col1, col2 = st.columns(2)
             with col1:
-                st.download_button(label="Download",
-                                   data=markdown_file,
-                                   file_name=f"{row['project_name'].replace(' ', '_')}_proposal.md",
-                                   mime="text/markdown",
-                                   key=download_button_key)
+                if proposal_markdown is not None:
+                    st.download_button(label="Download",
+                                       data=generate_markdown_file(format_proposal_as_markdown(proposal, inline_images=True)),
+                                       file_name=f"{row['project_name'].replace(' ', '_')}_proposal.md",
+                                       mime="text/markdown",
+                                       key=download_button_key)
 
             with col2:
                 if st.button("Delete", key=delete_button_key):
@@ -1069,33 +1811,32 @@ def display_section(df, section_name,section_key):
    
 
 
-def show_all(filtered_approved, filtered_rejected, filtered_edit_prop, filtered_completed,pending_proposal): #filtered_edit_completion
+def show_all(filters):
     """
     Displays multiple sections of proposals, each with specific filters applied.
 
     This function iterates over a list of tuples that define sections of data (like approved projects or rejected proposals).
-    Each section is displayed with its respective DataFrame. If there is a pending deletion action, it also handles it.
+    Each section is paginated on its own and only the selected page is fetched. Proposals are listed as summaries, their markdown,
+    images and download are only produced for the ones the user opens. If there is a pending deletion action, it also handles it.
 
     Parameters:
-    - filtered_approved (DataFrame): Filtered DataFrame for approved projects.
-    - filtered_rejected (DataFrame): Filtered DataFrame for rejected proposals.
-    - filtered_edit_prop (DataFrame): Filtered DataFrame for proposals to be edited.
-    - filtered_completed (DataFrame): Filtered DataFrame for completed projects.
-    - filtered_edit_completion (DataFrame): Filtered DataFrame for completion requiring edits.
+    - filters (dict): The filters selected in the sidebar, see `build_filter_clause`.
 
     There are no return values. This function updates the UI and may modify the session state based on user interactions.
     """
     # Display Sections with Filtered DataFrames
     sections = [
-        ("Pending Approval","pending approval",pending_proposal),
-        ("Approved Projects", "approved", filtered_approved),
-        ("Rejected Proposals", "rejected", filtered_rejected),
-        ("Proposals to be Edited", "to_edit_proposal", filtered_edit_prop),
-        ("Completed Projects", "approved_completion", filtered_completed)
-        
+        ("Pending Approval","pending approval","pending_approval"),
+        ("Approved Projects", "approved", "approved"),
+        ("Rejected Proposals", "rejected", "rejected"),
+        ("Proposals to be Edited", "to_edit_proposal", "to_edit"),
+        ("Completed Projects", "approved_completion", "completed")
+
         # ("Completion Requiring Edits", "edit_completion", filtered_edit_completion),
     ]
 
-    for section_name, section_key, df in sections:
+    for section_name, section_key, view in sections:
+        st.header(section_name)
+        df = fetch_paginated(view, filters, key=f"all_{section_key}")
         display_section(df, section_name, section_key)
 
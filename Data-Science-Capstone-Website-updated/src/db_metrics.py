@@ -0,0 +1,262 @@
+import bisect
+import json
+import random
+import re
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """
+    Process-wide counters describing how the connection pool copes with the load.
+
+    Checkout waits show whether sessions queue for a connection, saturation how close the pool is to its limit
+    (`pool_size + max_overflow`), and connects/invalidations how often new Cloud SQL connections are opened
+    and stale ones discarded by the pre-ping.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+        self.peak_checked_out = 0
+        self.connects = 0
+        self.connect_failures = 0
+        self.connect_time_total = 0.0
+        self.invalidations = 0
+
+    def record_checkout(self, checked_out):
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_checkout_wait(self, wait):
+        with self._lock:
+            self.checkout_wait_total += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+    def record_checkout_timeout(self):
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def record_connect(self, duration, ok):
+        with self._lock:
+            if ok:
+                self.connects += 1
+                self.connect_time_total += duration
+            else:
+                self.connect_failures += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self, pool):
+        """
+        Combines the counters with the current state of `pool`.
+
+        Parameters:
+        - pool (InstrumentedQueuePool): The pool of the engine being monitored.
+
+        Returns:
+        - dict: pool_size, max_overflow, checked_out, idle, overflow, saturation (checked out connections over
+          the most the pool can hand out), peak_checked_out, checkouts, avg/max checkout wait in seconds,
+          checkout_timeouts, connects, connect_failures, avg_connect_seconds and invalidations.
+        """
+        capacity = pool.size() + max(pool.max_overflow, 0)
+        checked_out = pool.checkedout()
+        with self._lock:
+            return {
+                'pool_size': pool.size(),
+                'max_overflow': pool.max_overflow,
+                'checked_out': checked_out,
+                'idle': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'saturation': checked_out / capacity if capacity else 0.0,
+                'peak_checked_out': self.peak_checked_out,
+                'checkouts': self.checkouts,
+                'avg_checkout_wait_seconds': self.checkout_wait_total / self.checkouts if self.checkouts else 0.0,
+                'max_checkout_wait_seconds': self.checkout_wait_max,
+                'checkout_timeouts': self.checkout_timeouts,
+                'connects': self.connects,
+                'connect_failures': self.connect_failures,
+                'avg_connect_seconds': self.connect_time_total / self.connects if self.connects else 0.0,
+                'invalidations': self.invalidations,
+            }
+
+
+# Shared by the engine's pool; module level so that it survives `Pool.recreate` after a disconnect
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records in `pool_metrics` how long every checkout waited for a connection.
+
+    SQLAlchemy has no event fired before a checkout, so the public `connect` method, through which the engine
+    checks connections out, is timed. Everything else is recorded by the pool events, see `instrument_pool`.
+    """
+
+    def __init__(self, creator, max_overflow=10, **kw):
+        super().__init__(creator, max_overflow=max_overflow, **kw)
+        self.max_overflow = max_overflow
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_metrics.record_checkout_timeout()
+            raise
+        pool_metrics.record_checkout_wait(time.perf_counter() - start)
+        return connection
+
+
+def instrument_pool(engine):
+    """Counts the checkouts of the engine's pool, its peak usage and the connections it discards, e.g. after a failed pre-ping."""
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_metrics.record_checkout(engine.pool.checkedout())
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.record_invalidation()
+
+
+# Upper bounds in seconds of the query latency histogram buckets; the last bucket has no bound
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_STATEMENT_NAME = re.compile(
+    r"^\s*(SELECT|INSERT|UPDATE|DELETE|CREATE|ALTER|DROP)\b(?:.*?\b(?:FROM|INTO|TABLE(?: IF NOT EXISTS)?)\s+|\s+)`?(\w+)",
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def statement_name(statement):
+    """
+    Names a statement after its verb and first table, e.g. 'SELECT student_infos', so that its executions
+    are aggregated whatever their parameters.
+    """
+    match = _STATEMENT_NAME.match(statement)
+    if match:
+        return f"{match.group(1).upper()} {match.group(2)}"
+    return statement.split(None, 1)[0].upper() if statement.strip() else "EMPTY"
+
+
+def payload_size(parameters):
+    """Returns the bytes of str and bytes parameters sent with a statement, which is dominated by the image BLOBs."""
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        return sum(payload_size(item) for item in parameters)
+    values = parameters.values() if isinstance(parameters, dict) else (parameters or ())
+    return sum(len(value) for value in values if isinstance(value, (bytes, bytearray, str)))
+
+
+class QueryMetrics:
+    """Per statement name latency histograms, see `LATENCY_BUCKETS`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queries = {}
+
+    def record(self, name, duration, rowcount, payload):
+        with self._lock:
+            entry = self._queries.get(name)
+            if entry is None:
+                entry = self._queries[name] = {
+                    'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'rows': 0, 'payload_bytes': 0,
+                    'buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+                }
+            entry['count'] += 1
+            entry['total_seconds'] += duration
+            entry['max_seconds'] = max(entry['max_seconds'], duration)
+            entry['rows'] += max(rowcount, 0)
+            entry['payload_bytes'] += payload
+            entry['buckets'][bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+
+    def stats(self):
+        """
+        Returns, for every statement name, its count, total/avg/max seconds, rows, payload bytes, the bucket
+        counts keyed by their upper bound ('+Inf' for the last one), and p50/p95 estimated from the buckets.
+        """
+        labels = [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+        with self._lock:
+            queries = {name: dict(entry, buckets=list(entry['buckets'])) for name, entry in self._queries.items()}
+        for entry in queries.values():
+            entry['avg_seconds'] = entry['total_seconds'] / entry['count']
+            entry['p50_seconds'] = self._quantile(entry, 0.5)
+            entry['p95_seconds'] = self._quantile(entry, 0.95)
+            entry['buckets'] = dict(zip(labels, entry['buckets']))
+        return queries
+
+    @staticmethod
+    def _quantile(entry, q):
+        """Upper bound of the bucket holding the q-quantile, or the maximum when it falls in the last bucket."""
+        rank = q * entry['count']
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, entry['buckets']):
+            seen += count
+            if seen >= rank:
+                return bound
+        return entry['max_seconds']
+
+    def clear(self):
+        with self._lock:
+            self._queries.clear()
+
+
+query_metrics = QueryMetrics()
+
+# Accepted values of the `mode` argument of `instrument_queries`
+QUERY_LOG_MODES = ('off', 'histogram', 'sampled', 'all')
+
+
+def instrument_queries(engine, mode='sampled', sample_rate=0.01, slow_seconds=1.0):
+    """
+    Times every statement the engine runs and records it in `query_metrics`.
+
+    Parameters:
+    - engine (Engine): The engine to instrument.
+    - mode (str): 'off' disables the timing, 'histogram' only records the metrics, 'sampled' also logs a
+      `sample_rate` fraction of the statements plus every statement slower than `slow_seconds`, and 'all' logs
+      every statement. Log lines are JSON objects with the statement name, duration, row count and payload
+      size; the SQL text and parameters are never logged.
+    - sample_rate (float): Fraction of the statements logged in 'sampled' mode.
+    - slow_seconds (float): Statements at least this slow are always logged in 'sampled' mode.
+    """
+    if mode not in QUERY_LOG_MODES:
+        raise ValueError(f"Unknown query log mode {mode!r}, expected one of {', '.join(QUERY_LOG_MODES)}")
+    if mode == 'off':
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['query_start'].pop()
+        name = context.execution_options.get('query_name') or statement_name(statement)
+        rowcount = cursor.rowcount
+        payload = payload_size(parameters)
+        query_metrics.record(name, duration, rowcount, payload)
+        if mode == 'all' or (mode == 'sampled' and (duration >= slow_seconds or random.random() < sample_rate)):
+            print(json.dumps({
+                'event': 'sql_query',
+                'name': name,
+                'duration_ms': round(duration * 1000, 3),
+                'rows': rowcount,
+                'payload_bytes': payload,
+                'executemany': executemany,
+            }))
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # after_cursor_execute is not called for failed statements, drop their start time
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_start'):
+            conn.info['query_start'].pop()
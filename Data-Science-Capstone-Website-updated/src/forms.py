@@ -1,6 +1,8 @@
 import streamlit as st
 from data_management import save_uploaded_images, submit_proposal, submit_completion, save_uploaded_file, submit_prof_proposal,fetch_project_details
-from utils import format_proposal_as_markdown,generate_unique_id, is_github_repo_valid, convert_image_to_binary,process_student_data
+from utils import render_proposal_as_markdown,generate_unique_id, convert_image_to_binary
+from repo_validation import VALID, INVALID, check_github_repo, normalize_github_url
+from archive_jobs import enqueue_job, get_job
 import pandas as pd
 def initialize_placeholder_data():
     # Placeholder proposal data structure
@@ -196,11 +198,38 @@ def proposal_request_form():
 
             }
         
-            st.markdown(format_proposal_as_markdown(preview_data), unsafe_allow_html=True)
+            # The draft is not saved yet: rendered with its images inline, neither published nor cached
+            st.markdown(render_proposal_as_markdown(preview_data, inline_images=True), unsafe_allow_html=True)
 
 
 
 
+def show_archive_job_status(job_id):
+    """
+    Shows the progress of the background job archiving a submitted repository.
+
+    Parameters:
+    - job_id (str): The job queued by the completion form.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return
+    repo = job['payload']['repo_url']
+    if job['status'] == 'queued':
+        if job['attempts']:
+            st.warning(f"Archiving {repo} failed, it will be retried (attempt {job['attempts']}/{job['max_attempts']}): {job['error']}")
+        else:
+            st.info(f"Archiving {repo} is queued.")
+    elif job['status'] == 'running':
+        st.info(f"Archiving {repo} is in progress.")
+    elif job['status'] == 'done':
+        st.success(f"Repository {repo} archived.")
+    else:
+        st.error(f"Archiving {repo} failed: {job['error']}")
+    if job['status'] in ('queued', 'running'):
+        if st.button("Refresh archive status"):
+            st.rerun()
+
 def completion_form():
     """
     Displays a form for users to submit completion details of an approved project proposal.
@@ -214,6 +243,8 @@ def completion_form():
     """
 
     st.subheader("Project Completion Form")
+    if 'archive_job_id' in st.session_state:
+        show_archive_job_status(st.session_state.archive_job_id)
      # Search box for proposal ID
     proposal_id_search = st.text_input("Enter Proposal ID to retrieve project details:")
 
@@ -243,15 +274,23 @@ def completion_form():
             submit_button = st.form_submit_button(label='Submit')
             
             if validate_button:
-                if is_github_repo_valid(github_repo):
-                    st.success("GitHub repository is valid.")
+                status, message = check_github_repo(github_repo)
+                if status == VALID:
+                    st.success(message)
+                elif status == INVALID:
+                    st.error(f"Invalid GitHub repository. {message}")
                 else:
-                    st.error("Invalid GitHub repository. Please check the URL.")
+                    st.warning(message)
 
             if submit_button:
-                if not is_github_repo_valid(github_repo):
-                    st.error("Cannot submit: Invalid GitHub repository. Please validate the URL first.")
+                # Answered from the cache when the link was just validated
+                status, message = check_github_repo(github_repo)
+                if status == INVALID:
+                    st.error(f"Cannot submit: Invalid GitHub repository. {message}")
                     return
+                if status != VALID:
+                    # GitHub is unavailable or rate limited, do not block the submission on it
+                    st.warning(f"{message} The completion is submitted anyway.")
                 # Save the uploaded Word document when the form is submitted
                 save_uploaded_file(uploaded_file)
                 # completion_id = generate_unique_id()
@@ -261,6 +300,7 @@ def completion_form():
                     "github_link" : github_repo,
                     "project_website": project_website,
                     "project_document" : uploaded_file.name if uploaded_file is not None else "File not uploaded",
+                    "project_document_data": uploaded_file.getvalue() if uploaded_file is not None else None,
                     "year" : year,
                     "semester": semester,
                     "name": name,
@@ -278,10 +318,8 @@ def completion_form():
                     "approach": project_details["approach"][0],
                     "proposal_id":project_details["proposal_id"][0],
                     "proposed_by_professor": project_details["proposed_by_professor"][0],
-                    "status":project_details["status"][0],
-                    "objective_image":project_details["objective_image"][0],
-                    "dataset_image":project_details["dataset_image"][0],
-                    "possible_issues_image": project_details["possible_issues_image"][0]
+                    "status":project_details["status"][0]
+                    # The images are not part of the form, submit_completion leaves them as stored
                 }
                 
                 submit_completion(completion)
@@ -289,9 +327,11 @@ def completion_form():
                 student_data = {
                     'semester': str(semester) + " " +str(year),
                     'name': str(name),
-                    'repo_url': str(github_repo)
+                    # Clone from the repository root even when a /tree/... link was submitted
+                    'repo_url': normalize_github_url(github_repo) or str(github_repo)
                 }
-                process_student_data(student_data)
+                # Cloning and uploading the repository can take minutes, it is done by the archive workers
+                st.session_state.archive_job_id = enqueue_job(student_data, proposal_id=project_details["proposal_id"][0])
                 st.info(f"Note your Project Completion id is {proposal_id}")
             
                 st.rerun()
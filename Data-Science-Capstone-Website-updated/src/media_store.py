@@ -0,0 +1,60 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from archive_store import put_content_addressed, read_object
+
+
+load_dotenv() # take environment variables from .env.
+# Where the images and documents uploaded with the proposals are stored: a GCS bucket name, or a file:// URL
+# of a local directory (e.g. for tests)
+MEDIA_BUCKET = os.getenv('MEDIA_BUCKET', os.getenv('ARCHIVE_BUCKET', 'projects-capstone'))
+# Prefix of the content-addressed media objects
+MEDIA_PREFIX = 'media/sha256'
+# Objects downloaded concurrently by `get_many_media`
+MEDIA_DOWNLOAD_THREADS = int(os.getenv('MEDIA_DOWNLOAD_THREADS', 8))
+
+
+def media_object_name(reference):
+    """Returns the name of the object holding the content with this SHA-256."""
+    return f"{MEDIA_PREFIX}/{reference[:2]}/{reference}"
+
+
+def put_media(data, bucket_name=None):
+    """
+    Stores binary content under its SHA-256 unless it is already stored.
+
+    Parameters:
+    - data (bytes): The uploaded image or document.
+    - bucket_name (str): A GCS bucket name or a file:// URL, `MEDIA_BUCKET` by default.
+
+    Returns:
+    - str: The reference of the content, its hex SHA-256, saved in student_infos in place of the BLOB.
+    """
+    reference = hashlib.sha256(data).hexdigest()
+    put_content_addressed(bucket_name or MEDIA_BUCKET, media_object_name(reference), lambda: data)
+    return reference
+
+
+def get_media(reference, bucket_name=None):
+    """Reads the content stored under a reference returned by `put_media`."""
+    return read_object(bucket_name or MEDIA_BUCKET, media_object_name(reference))
+
+
+def get_many_media(references, bucket_name=None):
+    """
+    Reads several stored contents concurrently.
+
+    Parameters:
+    - references (iterable of str): References returned by `put_media`.
+    - bucket_name (str): A GCS bucket name or a file:// URL, `MEDIA_BUCKET` by default.
+
+    Returns:
+    - dict: Maps every reference to its content.
+    """
+    references = list(set(references))
+    if not references:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(MEDIA_DOWNLOAD_THREADS, len(references))) as executor:
+        contents = executor.map(lambda reference: get_media(reference, bucket_name), references)
+        return dict(zip(references, contents))
@@ -0,0 +1,78 @@
+import argparse
+from sqlalchemy import text
+from data_management import engine, IMAGE_COLUMNS, MEDIA_REFERENCES
+from media_store import MEDIA_BUCKET, put_media
+from migrations import apply_migrations
+
+
+def fetch_blob_batch(connection, after_id, batch_size):
+    """
+    Fetches the next batch of proposals still holding at least one image BLOB.
+
+    Parameters:
+    - connection (Connection): An open database connection.
+    - after_id (str): The last proposal_id of the previous batch, '' for the first one.
+    - batch_size (int): The maximum number of proposals to return.
+
+    Returns:
+    - list of dict: The proposals of the batch, with their proposal_id and image BLOBs.
+    """
+    query = f"""
+    SELECT proposal_id, {', '.join(IMAGE_COLUMNS)}
+    FROM student_infos
+    WHERE proposal_id > :after_id AND ({' OR '.join(f'{column} IS NOT NULL' for column in IMAGE_COLUMNS)})
+    ORDER BY proposal_id
+    LIMIT :batch_size
+    """
+    return [dict(row) for row in connection.execute(text(query), {'after_id': after_id, 'batch_size': batch_size}).mappings()]
+
+
+def migrate_media(batch_size=20):
+    """
+    Moves the image BLOBs of student_infos to the media store, leaving references in their place.
+
+    A BLOB is only cleared once its content is stored, and each batch is committed on its own, so the command
+    can be interrupted and started again and will carry on with the BLOBs that are left.
+
+    Parameters:
+    - batch_size (int): How many proposals are read and written per transaction.
+
+    Returns:
+    - tuple: The number of proposals and of images moved.
+    """
+    proposals = 0
+    images = 0
+    after_id = ''
+    apply_migrations(engine)
+    with engine.connect() as connection:
+        while True:
+            batch = fetch_blob_batch(connection, after_id, batch_size)
+            if not batch:
+                break
+            for proposal in batch:
+                for column in IMAGE_COLUMNS:
+                    if proposal[column] is None:
+                        continue
+                    reference_column = MEDIA_REFERENCES[column]
+                    connection.execute(
+                        text(f"UPDATE student_infos SET {reference_column} = :reference, {column} = NULL WHERE proposal_id = :proposal_id"),
+                        {'reference': put_media(bytes(proposal[column])), 'proposal_id': proposal['proposal_id']}
+                    )
+                    images += 1
+            connection.commit()
+            proposals += len(batch)
+            after_id = batch[-1]['proposal_id']
+            print(f"Moved the images of {proposals} proposals")
+    return proposals, images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Move the image BLOBs of student_infos to the media store ({MEDIA_BUCKET}).")
+    parser.add_argument("--batch-size", type=int, default=20, help="Proposals read and written per transaction.")
+    args = parser.parse_args()
+
+    proposals, images = migrate_media(args.batch_size)
+    print(f"Done: {images} images of {proposals} proposals moved.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import argparse
+from sqlalchemy import text
+
+
+# Bookkeeping table recording which migrations were applied to the database
+SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT NOT NULL PRIMARY KEY,
+    description VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+STUDENT_INFOS_DDL = """
+CREATE TABLE IF NOT EXISTS student_infos (
+    proposal_id VARCHAR(64) NOT NULL,
+    name VARCHAR(255) NULL,
+    project_name VARCHAR(255) NULL,
+    mentor VARCHAR(255) NULL,
+    mentor_email VARCHAR(255) NULL,
+    github_link VARCHAR(512) NULL,
+    objective TEXT NULL,
+    rationale TEXT NULL,
+    timeline TEXT NULL,
+    contributors TEXT NULL,
+    semester VARCHAR(16) NULL,
+    year VARCHAR(16) NULL,
+    expected_students INT NULL,
+    dataset TEXT NULL,
+    approach TEXT NULL,
+    possible_issues TEXT NULL,
+    proposed_by_professor BOOLEAN NOT NULL DEFAULT FALSE,
+    status VARCHAR(64) NULL,
+    video_link VARCHAR(512) NULL,
+    project_website VARCHAR(512) NULL,
+    project_document VARCHAR(255) NULL,
+    objective_image MEDIUMBLOB NULL,
+    dataset_image MEDIUMBLOB NULL,
+    possible_issues_image MEDIUMBLOB NULL,
+    PRIMARY KEY (proposal_id),
+    INDEX idx_student_infos_status (status),
+    INDEX idx_student_infos_prof_status (proposed_by_professor, status)
+)
+"""
+
+PROPOSAL_THUMBNAILS_DDL = """
+CREATE TABLE IF NOT EXISTS proposal_thumbnails (
+    proposal_id VARCHAR(64) NOT NULL,
+    image_column VARCHAR(32) NOT NULL,
+    width INT NOT NULL,
+    source_hash CHAR(64) NULL,
+    thumbnail MEDIUMTEXT NULL,
+    PRIMARY KEY (proposal_id, image_column)
+)
+"""
+
+# Single-row counter handing out the change versions of student_infos, see `data_management.record_changes`
+CHANGE_SEQUENCE_DDL = """
+CREATE TABLE IF NOT EXISTS change_sequence (
+    id TINYINT NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL
+)
+"""
+
+# Proposals deleted from student_infos, with the change version of the deletion
+STUDENT_INFOS_DELETIONS_DDL = """
+CREATE TABLE IF NOT EXISTS student_infos_deletions (
+    proposal_id VARCHAR(64) NOT NULL PRIMARY KEY,
+    change_version BIGINT NOT NULL,
+    INDEX idx_student_infos_deletions_version (change_version)
+)
+"""
+
+# Name of the MySQL advisory lock serializing migrations between server processes starting together
+MIGRATION_LOCK = "capstone_schema_migrations"
+
+
+def column_exists(connection, table, column):
+    """Checks whether a column exists on a table of the current database."""
+    query = """
+    SELECT COUNT(*) FROM information_schema.columns
+    WHERE table_schema = DATABASE() AND table_name = :table AND column_name = :column
+    """
+    return connection.execute(text(query), {'table': table, 'column': column}).scalar() > 0
+
+
+def index_exists(connection, table, index):
+    """
+    Checks whether an index exists on a table of the current database.
+
+    Parameters:
+    - connection (Connection): An open database connection.
+    - table (str): The table name.
+    - index (str): The index name, 'PRIMARY' for the primary key.
+
+    Returns:
+    - bool: True if the index exists.
+    """
+    query = """
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index
+    """
+    return connection.execute(text(query), {'table': table, 'index': index}).scalar() > 0
+
+
+def create_student_infos(connection):
+    """Creates student_infos with its keys when the database is empty."""
+    connection.execute(text(STUDENT_INFOS_DDL))
+
+
+def find_invalid_proposal_ids(connection):
+    """
+    Finds the student_infos rows that would make the primary key on proposal_id fail.
+
+    Returns:
+    - list of str: A description of every problem found: duplicated IDs with their count, missing IDs and IDs
+      longer than 64 characters. Empty when the key can be added.
+    """
+    problems = []
+    duplicates = connection.execute(text(
+        "SELECT proposal_id, COUNT(*) FROM student_infos WHERE proposal_id IS NOT NULL "
+        "GROUP BY proposal_id HAVING COUNT(*) > 1 ORDER BY proposal_id"
+    )).all()
+    problems += [f"{proposal_id!r} is used by {count} rows" for proposal_id, count in duplicates]
+    missing = connection.execute(text("SELECT COUNT(*) FROM student_infos WHERE proposal_id IS NULL")).scalar()
+    if missing:
+        problems.append(f"{missing} rows have no proposal_id")
+    too_long = connection.execute(text(
+        "SELECT proposal_id FROM student_infos WHERE CHAR_LENGTH(proposal_id) > 64 ORDER BY proposal_id"
+    )).scalars().all()
+    problems += [f"{proposal_id!r} is longer than 64 characters" for proposal_id in too_long]
+    return problems
+
+
+def add_primary_key(connection):
+    """
+    Adds the primary key on proposal_id to a student_infos table created before the migrations existed.
+
+    The rows are checked first, so that duplicated or missing IDs stop the migration with the list of rows to
+    fix instead of failing in the middle of the ALTER TABLE.
+    """
+    if not index_exists(connection, 'student_infos', 'PRIMARY'):
+        problems = find_invalid_proposal_ids(connection)
+        if problems:
+            raise RuntimeError(
+                "Cannot add the primary key on student_infos.proposal_id, fix these rows first: " + "; ".join(problems)
+            )
+        connection.execute(text(
+            "ALTER TABLE student_infos MODIFY proposal_id VARCHAR(64) NOT NULL, ADD PRIMARY KEY (proposal_id)"
+        ))
+
+
+def add_status_indexes(connection):
+    """Adds the indexes used by the status views to a student_infos table created before the migrations existed."""
+    if not index_exists(connection, 'student_infos', 'idx_student_infos_status'):
+        connection.execute(text(
+            "ALTER TABLE student_infos MODIFY status VARCHAR(64) NULL, ADD INDEX idx_student_infos_status (status)"
+        ))
+    if not index_exists(connection, 'student_infos', 'idx_student_infos_prof_status'):
+        connection.execute(text(
+            "ALTER TABLE student_infos ADD INDEX idx_student_infos_prof_status (proposed_by_professor, status)"
+        ))
+
+
+def create_proposal_thumbnails(connection):
+    """Creates the side table holding the thumbnails written with each proposal."""
+    connection.execute(text(PROPOSAL_THUMBNAILS_DDL))
+
+
+def add_change_versions(connection):
+    """
+    Adds the change feed of student_infos: the version of the last write to every row, the deleted proposals
+    and the counter both are stamped from. Rows written before this migration keep version 0.
+    """
+    connection.execute(text(CHANGE_SEQUENCE_DDL))
+    connection.execute(text("INSERT IGNORE INTO change_sequence (id, version) VALUES (1, 0)"))
+    if not column_exists(connection, 'student_infos', 'change_version'):
+        connection.execute(text("ALTER TABLE student_infos ADD COLUMN change_version BIGINT NOT NULL DEFAULT 0"))
+    if not index_exists(connection, 'student_infos', 'idx_student_infos_change_version'):
+        connection.execute(text("ALTER TABLE student_infos ADD INDEX idx_student_infos_change_version (change_version)"))
+    connection.execute(text(STUDENT_INFOS_DELETIONS_DDL))
+
+
+def add_media_references(connection):
+    """
+    Adds the columns referencing the images and the project document kept in the media store (see
+    media_store.py). The existing BLOBs are moved out by migrate_media.py.
+    """
+    for column in ('objective_image_ref', 'dataset_image_ref', 'possible_issues_image_ref', 'project_document_ref'):
+        if not column_exists(connection, 'student_infos', column):
+            connection.execute(text(f"ALTER TABLE student_infos ADD COLUMN {column} CHAR(64) NULL"))
+
+
+# Ordered list of (version, description, step). Versions are never reused or reordered; a schema change is
+# made by appending a new entry. Steps must tolerate a database already in the target state, since MySQL DDL
+# is not transactional and a step may have run before its version was recorded.
+MIGRATIONS = [
+    (1, "Create student_infos", create_student_infos),
+    (2, "Primary key on student_infos.proposal_id", add_primary_key),
+    (3, "Indexes on student_infos (status) and (proposed_by_professor, status)", add_status_indexes),
+    (4, "Create proposal_thumbnails", create_proposal_thumbnails),
+    (5, "Change versions on student_infos and student_infos_deletions", add_change_versions),
+    (6, "Media store references on student_infos", add_media_references),
+]
+
+
+def applied_versions(connection):
+    """Returns the set of migration versions already recorded in schema_migrations."""
+    return set(connection.execute(text("SELECT version FROM schema_migrations")).scalars().all())
+
+
+def apply_migrations(engine, lock_timeout=60):
+    """
+    Brings the database schema up to date by applying the pending entries of `MIGRATIONS` in order.
+
+    Safe to call on every startup: applied versions are skipped, and an advisory lock makes concurrent
+    server processes wait for the first one instead of running the same DDL twice.
+
+    Parameters:
+    - engine (Engine): The SQLAlchemy engine of the database to migrate.
+    - lock_timeout (int): Seconds to wait for another process holding the migration lock.
+
+    Returns:
+    - list of int: The versions applied by this call.
+    """
+    applied = []
+    with engine.connect() as connection:
+        if not connection.execute(text("SELECT GET_LOCK(:name, :timeout)"), {'name': MIGRATION_LOCK, 'timeout': lock_timeout}).scalar():
+            raise RuntimeError("Timed out waiting for another process to finish the schema migrations.")
+        try:
+            connection.execute(text(SCHEMA_MIGRATIONS_DDL))
+            done = applied_versions(connection)
+            for version, description, step in MIGRATIONS:
+                if version in done:
+                    continue
+                step(connection)
+                connection.execute(
+                    text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                    {'version': version, 'description': description}
+                )
+                connection.commit()
+                applied.append(version)
+                print(f"Applied migration {version}: {description}")
+        finally:
+            connection.execute(text("SELECT RELEASE_LOCK(:name)"), {'name': MIGRATION_LOCK})
+            connection.commit()
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the pending database schema migrations.")
+    parser.add_argument("--status", action="store_true", help="List the migrations and whether they are applied.")
+    args = parser.parse_args()
+
+    from data_management import engine
+    if args.status:
+        with engine.connect() as connection:
+            connection.execute(text(SCHEMA_MIGRATIONS_DDL))
+            done = applied_versions(connection)
+        for version, description, _ in MIGRATIONS:
+            print(f"{version:>4} {'applied' if version in done else 'pending':<8} {description}")
+    else:
+        applied = apply_migrations(engine)
+        print(f"{len(applied)} migrations applied.")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import streamlit as st
-from data_management import  check_action_and_prompt_password,fetch_pending_approval,fetch_approved_proposals #approve_completion, edit_completion,
+from data_management import  check_action_and_prompt_password,fetch_pending_approval,fetch_approved_proposals,attach_proposal_images,select_proposals,bulk_action_buttons,check_bulk_action_and_prompt_password #approve_completion, edit_completion,
 from utils import format_proposal_as_markdown, format_completion_as_markdown
 import pandas as pd
 
@@ -20,10 +20,15 @@ def pending_approval_page(session):
     """
     
     # session = fetch_pending_approval()
-    session = session.to_dict('index')
+    session = attach_proposal_images(session).to_dict('index')
     session = [value for value in session.values()]
     
     if session:
+        # Review many proposals at once: one transaction and one password prompt for the whole selection
+        selected = select_proposals(session, key="pending_approval")
+        bulk_action_buttons(selected, ['approve', 'reject', 'edit'], key="pending_approval")
+        check_bulk_action_and_prompt_password("pending_approval")
+
         for index, proposal in enumerate(session):
             with st.expander(f"Approve/Reject/Edit:   {proposal['project_name']}, Year - {proposal['year']}, Semester - {proposal['semester']}, and Contributors - {proposal['contributors']}"):
                 st.markdown(format_proposal_as_markdown(proposal), unsafe_allow_html=True)
@@ -0,0 +1,288 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from cachetools import LRUCache
+
+
+# Base URL of the GitHub REST API, pointed at a stub server to test the validation offline
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+# Optional token, raises the rate limit from 60 to 5000 requests per hour
+GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
+GITHUB_API_TIMEOUT = float(os.getenv('GITHUB_API_TIMEOUT', 5))
+# Seconds a repository found to exist, or not to exist, is trusted before GitHub is asked again
+REPO_VALID_TTL = float(os.getenv('REPO_VALID_TTL', 3600))
+REPO_INVALID_TTL = float(os.getenv('REPO_INVALID_TTL', 300))
+# Backends asked in order until one of them can tell whether a repository exists, see `BACKENDS`
+REPO_VALIDATION_BACKENDS = [name.strip() for name in os.getenv('REPO_VALIDATION_BACKENDS', 'api,ls-remote').split(',') if name.strip()]
+# Base URL `git ls-remote` is run against, e.g. file:///srv/git to test with local bare repositories
+GITHUB_GIT_URL = os.getenv('GITHUB_GIT_URL', 'https://github.com').rstrip('/')
+GIT_LS_REMOTE_TIMEOUT = float(os.getenv('GIT_LS_REMOTE_TIMEOUT', 15))
+# Directory of a locally maintained mirror laid out as <owner>/<repo>.git (lowercase), unset when there is none
+REPO_MIRROR_DIR = os.getenv('REPO_MIRROR_DIR')
+
+# Validation outcomes. UNKNOWN means GitHub could not be asked (rate limit, network error), which says nothing
+# about the repository itself.
+VALID = 'valid'
+INVALID = 'invalid'
+UNKNOWN = 'unknown'
+
+_session = None
+_session_lock = threading.Lock()
+
+# owner/repo -> {'status', 'message', 'etag', 'expires_at'}. Expired entries are kept for their ETag and as
+# a fallback while GitHub cannot be reached.
+_cache = LRUCache(maxsize=4096)
+_cache_lock = threading.Lock()
+# Time before which no request is sent, set from the rate limit headers of the last response
+_blocked_until = 0.0
+
+
+def get_session():
+    """Returns the HTTP session shared by the validations, keeping connections to the API alive."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            session.headers.update({'Accept': 'application/vnd.github+json', 'User-Agent': 'ds-capstone-website'})
+            if GITHUB_TOKEN:
+                session.headers['Authorization'] = f"Bearer {GITHUB_TOKEN}"
+            _session = session
+        return _session
+
+
+_GITHUB_URL = re.compile(
+    r"^(?:(?:https?://|ssh://git@|git://)(?:www\.)?github\.com/|git@github\.com:)"
+    r"(?P<owner>[A-Za-z0-9-]+)/(?P<repo>[A-Za-z0-9._-]+?)(?:\.git)?/?(?:[/?#].*)?$"
+)
+
+
+def parse_github_url(github_link):
+    """
+    Extracts the owner and repository name of a GitHub repository URL.
+
+    Besides https://github.com/<owner>/<repo>, links with a trailing slash or `.git`, links to a branch, folder
+    or file of the repository (`/tree/...`, `/blob/...`) and SSH clone URLs are accepted.
+
+    Returns:
+    - tuple of str: (owner, repo), or None if the URL is not a GitHub repository URL.
+    """
+    match = _GITHUB_URL.match(github_link.strip())
+    if match is None:
+        return None
+    return match.group('owner'), match.group('repo')
+
+
+def normalize_github_url(github_link):
+    """Returns the canonical https://github.com/<owner>/<repo> form of a repository URL, or None if it is not one."""
+    parsed = parse_github_url(github_link)
+    return f"https://github.com/{parsed[0]}/{parsed[1]}" if parsed else None
+
+
+def record_rate_limit(response):
+    """Stops the requests until GitHub's rate limit resets when the response says it is exhausted."""
+    global _blocked_until
+    headers = response.headers
+    if headers.get('Retry-After', '').isdigit():
+        _blocked_until = time.time() + int(headers['Retry-After'])
+    elif headers.get('X-RateLimit-Remaining') == '0' and headers.get('X-RateLimit-Reset', '').isdigit():
+        _blocked_until = float(headers['X-RateLimit-Reset'])
+
+
+def is_rate_limited(response):
+    return response.status_code == 429 or (
+        response.status_code == 403 and
+        (response.headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in response.headers)
+    )
+
+
+def cached_entry(key):
+    """Returns the cache entry of a key, fresh or expired, or None."""
+    with _cache_lock:
+        return _cache.get(key)
+
+
+def store(key, status, message, etag=None):
+    ttl = REPO_VALID_TTL if status == VALID else REPO_INVALID_TTL
+    with _cache_lock:
+        _cache[key] = {'status': status, 'message': message, 'etag': etag, 'expires_at': time.time() + ttl}
+    return status, message
+
+
+def check_with_api(owner, repo):
+    """
+    Checks a repository with the GitHub REST API.
+
+    Results are cached, for `REPO_VALID_TTL` seconds when the repository exists and `REPO_INVALID_TTL` when it
+    does not. Expired entries are revalidated with a conditional request, which GitHub answers with 304 without
+    counting it against the rate limit. While the rate limit is exhausted no request is sent, the last known
+    result is returned instead or UNKNOWN if there is none.
+    """
+    key = f"api:{owner}/{repo}".lower()
+    now = time.time()
+    entry = cached_entry(key)
+    if entry is not None and entry['expires_at'] > now:
+        return entry['status'], entry['message']
+    if now < _blocked_until:
+        if entry is not None:
+            return entry['status'], entry['message']
+        resume = time.strftime('%H:%M', time.localtime(_blocked_until))
+        return UNKNOWN, f"GitHub's rate limit is reached, repositories cannot be checked before {resume}."
+
+    headers = {}
+    if entry is not None and entry['etag']:
+        headers['If-None-Match'] = entry['etag']
+    try:
+        response = get_session().get(f"{GITHUB_API_URL}/repos/{owner}/{repo}", headers=headers,
+                                     timeout=GITHUB_API_TIMEOUT)
+    except requests.RequestException as e:
+        if entry is not None:
+            return entry['status'], entry['message']
+        return UNKNOWN, f"GitHub could not be reached: {e}"
+    record_rate_limit(response)
+
+    if response.status_code == 304 and entry is not None:
+        return store(key, entry['status'], entry['message'], entry['etag'])
+    if response.status_code == 200:
+        return store(key, VALID, "GitHub repository is valid.", response.headers.get('ETag'))
+    if response.status_code in (404, 410, 451):
+        return store(key, INVALID, "Repository not found. Check the URL and that the repository is public.")
+    if entry is not None:
+        return entry['status'], entry['message']
+    if is_rate_limited(response):
+        return UNKNOWN, "GitHub's rate limit is reached, the repository could not be checked."
+    return UNKNOWN, f"GitHub answered with status {response.status_code}, the repository could not be checked."
+
+
+# git ls-remote errors meaning that the repository does not exist or is private. GitHub asks for credentials
+# instead of answering 404, which fails with "could not read Username" once prompts are disabled.
+_MISSING_REPO_ERRORS = ('not found', 'could not read username', 'does not appear to be a git repository',
+                        'does not exist', 'authentication failed')
+
+
+def check_with_ls_remote(owner, repo):
+    """
+    Checks a repository with `git ls-remote`, which uses no API quota. Results are cached like `check_with_api`.
+    """
+    key = f"ls-remote:{owner}/{repo}".lower()
+    entry = cached_entry(key)
+    if entry is not None and entry['expires_at'] > time.time():
+        return entry['status'], entry['message']
+    url = f"{GITHUB_GIT_URL}/{owner}/{repo}.git"
+    try:
+        process = subprocess.run(['git', 'ls-remote', '--exit-code', url, 'HEAD'], capture_output=True, text=True,
+                                 timeout=GIT_LS_REMOTE_TIMEOUT, env=dict(os.environ, GIT_TERMINAL_PROMPT='0'))
+    except (subprocess.TimeoutExpired, OSError) as e:
+        return UNKNOWN, f"git ls-remote could not reach the repository: {e}"
+    # Exit code 2 means the repository exists but has no HEAD yet
+    if process.returncode in (0, 2):
+        return store(key, VALID, "GitHub repository is valid.")
+    if any(error in process.stderr.lower() for error in _MISSING_REPO_ERRORS):
+        return store(key, INVALID, "Repository not found. Check the URL and that the repository is public.")
+    return UNKNOWN, f"git ls-remote failed: {process.stderr.strip()}"
+
+
+def check_with_mirror(owner, repo):
+    """
+    Checks a repository against the local mirror. A repository missing from the mirror gives UNKNOWN, as the
+    mirror may simply not have picked it up yet.
+    """
+    if not REPO_MIRROR_DIR:
+        return UNKNOWN, "No local mirror is configured."
+    if os.path.isdir(os.path.join(REPO_MIRROR_DIR, owner.lower(), f"{repo.lower()}.git")):
+        return VALID, "GitHub repository is valid."
+    return UNKNOWN, "The repository is not in the local mirror."
+
+
+# name: callable taking (owner, repo) and returning (status, message)
+BACKENDS = {
+    'api': check_with_api,
+    'ls-remote': check_with_ls_remote,
+    'mirror': check_with_mirror,
+}
+
+
+def check_github_repo(github_link, backends=None):
+    """
+    Checks that a GitHub repository exists and is public.
+
+    The backends are asked in order until one of them returns VALID or INVALID, so that e.g. `git ls-remote`
+    takes over while the API's rate limit is exhausted.
+
+    Parameters:
+    - github_link (str): The GitHub URL to be validated, see `parse_github_url` for the accepted forms.
+    - backends (list of str): Names from `BACKENDS`, `REPO_VALIDATION_BACKENDS` by default.
+
+    Returns:
+    - tuple: (status, message), status being VALID, INVALID or UNKNOWN.
+    """
+    parsed = parse_github_url(github_link)
+    if parsed is None:
+        return INVALID, "Not a GitHub repository URL, expected https://github.com/<owner>/<repository>."
+    status, message = UNKNOWN, "No validation backend is configured."
+    for name in backends or REPO_VALIDATION_BACKENDS:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown repository validation backend {name!r}, expected one of {', '.join(BACKENDS)}")
+        status, message = BACKENDS[name](*parsed)
+        if status != UNKNOWN:
+            break
+    return status, message
+
+
+def validate_repos(github_links, backends=None, max_workers=16):
+    """
+    Validates many repositories concurrently, e.g. every completed project of a semester.
+
+    Parameters:
+    - github_links (iterable of str): The URLs to validate. Links to the same repository are checked once.
+    - backends (list of str): See `check_github_repo`.
+    - max_workers (int): Repositories checked at the same time.
+
+    Returns:
+    - dict: Maps every link to its (status, message).
+    """
+    github_links = list(github_links)
+    by_repo = {}
+    for link in github_links:
+        by_repo.setdefault(normalize_github_url(link) or link, link)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(zip(by_repo, executor.map(lambda link: check_github_repo(link, backends), by_repo.values())))
+    return {link: results[normalize_github_url(link) or link] for link in github_links}
+
+
+def clear_cache():
+    """Forgets every cached result and the rate limit state."""
+    global _blocked_until
+    with _cache_lock:
+        _cache.clear()
+    _blocked_until = 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that GitHub repositories exist, one URL per line.")
+    parser.add_argument("file", nargs="?", help="File listing the URLs, standard input by default.")
+    parser.add_argument("--backends", default=",".join(REPO_VALIDATION_BACKENDS),
+                        help="Comma separated backends asked in order, among " + ", ".join(BACKENDS) + ".")
+    parser.add_argument("--workers", type=int, default=16, help="Repositories checked at the same time.")
+    args = parser.parse_args()
+
+    with (open(args.file) if args.file else sys.stdin) as lines:
+        links = [line.strip() for line in lines if line.strip()]
+    start = time.perf_counter()
+    results = validate_repos(links, backends=args.backends.split(","), max_workers=args.workers)
+    for link, (status, message) in results.items():
+        print(f"{status}\t{link}\t{message}")
+    counts = {status: sum(1 for result in results.values() if result[0] == status) for status in (VALID, INVALID, UNKNOWN)}
+    print(f"{len(results)} repositories checked in {time.perf_counter() - start:.1f}s: "
+          f"{counts[VALID]} valid, {counts[INVALID]} invalid, {counts[UNKNOWN]} unknown.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,20 @@ import shutil
 import uuid
 import requests
 import tarfile
+import re
 from google.cloud import storage
 import stat
+import signal
+import hashlib
+import contextlib
+import tempfile
+import threading
+import time
+from caching import ResultCache
+from archive_codecs import archive_extension, open_compressor
+import json
+from archive_store import atomic_file, iter_archived_files, local_path, store_snapshot, write_object
+from repo_validation import VALID, check_github_repo
 
 
 # local_dir = r"D:/Capstone Website - streamlit_dup/Data-Science-Capstone-Website/github clones"
@@ -35,19 +47,164 @@ def resize_image(image, width=300):
     target_height = int(aspect_ratio * width)
     return image.resize((width, target_height))
 
-def handle_image_markdown(blob_data):
-    """Converts BLOB data to a Markdown-compatible image tag."""
-    if blob_data is None:
-        return "Not uploaded"
-    else:
-        image_bytes_io = io.BytesIO(blob_data)
-        image = Image.open(image_bytes_io)
-        resized_image = resize_image(image)
-        base64_image = pil_image_to_base64(resized_image)
-        return f"![Uploaded Image]({base64_image})"
+# Thumbnails shared by every rerun and session of the server process, keyed by the content of the image
+thumbnail_cache = ResultCache(max_bytes=int(os.getenv('THUMBNAIL_CACHE_MAX_BYTES', 64 * 1024 * 1024)))
+
+def image_content_hash(blob_data):
+    """Returns the SHA-256 hex digest identifying an image by its content."""
+    return hashlib.sha256(blob_data).hexdigest()
+
+def get_thumbnail(blob_data, width=300):
+    """
+    Returns the base64 data URI of the resized image, decoding and resizing it only once per content.
+
+    Thumbnails are cached by the hash of the BLOB and the target width, so identical images uploaded with
+    different proposals share one entry. The least recently used thumbnails are dropped once the
+    THUMBNAIL_CACHE_MAX_BYTES budget is exceeded.
+
+    Parameters:
+    - blob_data (bytes): The stored image.
+    - width (int): The width of the thumbnail in pixels.
+
+    Returns:
+    - str: A `data:image/jpeg;base64,...` URI.
+    """
+    def render():
+        image = Image.open(io.BytesIO(blob_data))
+        return pil_image_to_base64(resize_image(image, width))
+
+    return thumbnail_cache.get_or_load((image_content_hash(blob_data), width), render)
+
+# Streamlit serves this directory, next to app.py, at app/static/ when server.enableStaticServing is on.
+# Each server writes the thumbnails it renders to its own directory, so when several replicas run behind a load
+# balancer, either this directory is a volume shared by all of them or sessions must be sticky (the page and
+# the image requests of a browser reaching the same replica). Otherwise static serving must stay disabled.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+# Subdirectory of STATIC_DIR holding the published thumbnails, named after their content hash
+STATIC_IMAGES_DIR = 'images'
+STATIC_IMAGE_EXTENSIONS = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif', 'image/webp': 'webp'}
+# Matches the file names of the thumbnails referenced by a rendered document
+STATIC_IMAGE_URL = re.compile(rf"app/static/{STATIC_IMAGES_DIR}/([0-9a-f]+\.[a-z]+)")
+
+def static_serving_enabled():
+    """Checks whether the Streamlit server serves STATIC_DIR."""
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+def publish_image(data_uri):
+    """
+    Writes a thumbnail to the static directory under its content hash, unless the file is there, and returns its URL.
+
+    The content never changes behind a URL, so the URL carries a `v` argument for which Streamlit's static
+    file handler answers with a ten year Cache-Control max-age: browsers download each thumbnail once instead
+    of receiving it inline with every rerun.
+
+    Parameters:
+    - data_uri (str): A `data:image/...;base64,...` URI, see `get_thumbnail`.
+
+    Returns:
+    - str: The relative URL of the image, e.g. 'app/static/images/<sha256>.jpg?v=<hash prefix>'.
+    """
+    header, encoded = data_uri.split(',', 1)
+    image_bytes = base64.b64decode(encoded)
+    digest = image_content_hash(image_bytes)
+    file_name = f"{digest}.{STATIC_IMAGE_EXTENSIONS.get(header[len('data:'):].split(';')[0], 'jpg')}"
+    name = f"{STATIC_IMAGES_DIR}/{file_name}"
+    if not os.path.exists(os.path.join(STATIC_DIR, name)):
+        # Renamed into place so that a browser never receives a partial image
+        write_object(f"file://{STATIC_DIR}", name, image_bytes)
+    return f"app/static/{STATIC_IMAGES_DIR}/{file_name}?v={digest[:16]}"
+
+def handle_image_markdown(blob_data, thumbnail=None, inline=False):
+    """
+    Converts BLOB data to a Markdown-compatible image tag.
+
+    A thumbnail precomputed at submit time is used as is; the BLOB is only resized when there is none. When the
+    server serves static files, the tag references the thumbnail's URL (see `publish_image`) rather than
+    embedding it.
+
+    Parameters:
+    - blob_data (bytes): The stored image, or None.
+    - thumbnail (str): Its precomputed thumbnail data URI, or None.
+    - inline (bool): Embed the thumbnail even when it could be served, for documents read outside the app.
+    """
+    if thumbnail is None:
+        if blob_data is None:
+            return "Not uploaded"
+        thumbnail = get_thumbnail(blob_data)
+    if not inline and static_serving_enabled():
+        try:
+            thumbnail = publish_image(thumbnail)
+        except Exception as e:
+            print(f"Error publishing image, embedding it instead: {e}")
+    return f"![Uploaded Image]({thumbnail})"
+
+
+# Rendered proposal and completion documents, shared by every session. The least recently used ones are dropped
+# once MARKDOWN_CACHE_MAX_BYTES is exceeded.
+markdown_cache = ResultCache(max_bytes=int(os.getenv('MARKDOWN_CACHE_MAX_BYTES', 32 * 1024 * 1024)))
+
+# Fields each document is rendered from
+PROPOSAL_MARKDOWN_FIELDS = [
+    "project_name", "name", "mentor_email", "mentor", "objective", "dataset", "rationale", "approach", "timeline",
+    "expected_students", "possible_issues", "github_link",
+    "objective_image", "dataset_image", "possible_issues_image",
+    "objective_image_thumbnail", "dataset_image_thumbnail", "possible_issues_image_thumbnail"
+]
+COMPLETION_MARKDOWN_FIELDS = ["project_name", "video_link", "github_link", "project_website", "project_document"]
+
+def document_key(kind, document, fields):
+    """
+    Returns the `markdown_cache` key of a document: its kind, its proposal_id and the hash of the fields it is
+    rendered from, so that an edited proposal gets a new entry instead of its stale rendering.
+
+    Parameters:
+    - kind (str): 'proposal' or 'completion'.
+    - document (dict): The proposal or completion being rendered.
+    - fields (list of str): The fields the rendering depends on.
+
+    Returns:
+    - tuple: The cache key.
+    """
+    digest = hashlib.sha256()
+    for field in fields:
+        value = document.get(field)
+        data = value if isinstance(value, (bytes, bytearray)) else str(value).encode('utf-8')
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    return (kind, document.get("proposal_id"), digest.hexdigest())
+
+def static_images_missing(markdown):
+    """Checks whether a rendered document references a published thumbnail that is no longer in STATIC_DIR."""
+    directory = os.path.join(STATIC_DIR, STATIC_IMAGES_DIR)
+    return any(not os.path.exists(os.path.join(directory, name)) for name in STATIC_IMAGE_URL.findall(markdown))
+
+def format_proposal_as_markdown(proposal, inline_images=False):
+    """
+    Returns the Markdown of a project proposal, rendered by `render_proposal_as_markdown` once per content.
+
+    A cached rendering whose thumbnails were removed from the static directory, e.g. by a redeployment or a
+    cleanup, is rendered again, which publishes them anew under the same URLs. Proposals without a proposal_id
+    are not saved, they are rendered with their images inline and not cached.
 
+    Parameters:
+    - proposal (dict): A dictionary containing all the necessary data to format the proposal.
+    - inline_images (bool): Embed the images instead of referencing their URLs, e.g. for a downloaded file.
 
-def format_proposal_as_markdown(proposal):
+    Returns:
+    - str: A string containing the formatted proposal in Markdown format.
+    """
+    if not proposal.get("proposal_id"):
+        return render_proposal_as_markdown(proposal, inline_images=True)
+    key = document_key("proposal", proposal, PROPOSAL_MARKDOWN_FIELDS) + (inline_images or not static_serving_enabled(),)
+    markdown = markdown_cache.get_or_load(key, lambda: render_proposal_as_markdown(proposal, inline_images))
+    if static_images_missing(markdown):
+        markdown = render_proposal_as_markdown(proposal, inline_images)
+    return markdown
+
+def render_proposal_as_markdown(proposal, inline_images=False):
     """
     Generates a Markdown representation of a project proposal including embedded images.
 
@@ -57,6 +214,7 @@ def format_proposal_as_markdown(proposal):
 
     Parameters:
     - proposal (dict): A dictionary containing all the necessary data to format the proposal.
+    - inline_images (bool): Embed the images instead of referencing their URLs, see `handle_image_markdown`.
 
     Returns:
     - str: A string containing the formatted proposal in Markdown format.
@@ -64,9 +222,9 @@ def format_proposal_as_markdown(proposal):
     
     # Convert binary data to bytes, then to an Image
     
-    objective_image = handle_image_markdown(proposal["objective_image"])
-    dataset_image = handle_image_markdown(proposal["dataset_image"])
-    possible_issues_image = handle_image_markdown(proposal["possible_issues_image"])
+    objective_image = handle_image_markdown(proposal["objective_image"], proposal.get("objective_image_thumbnail"), inline_images)
+    dataset_image = handle_image_markdown(proposal["dataset_image"], proposal.get("dataset_image_thumbnail"), inline_images)
+    possible_issues_image = handle_image_markdown(proposal["possible_issues_image"], proposal.get("possible_issues_image_thumbnail"), inline_images)
 
 
     # Embed the Base64 image string in the Markdown template
@@ -116,6 +274,20 @@ def format_proposal_as_markdown(proposal):
     return markdown_template
 
 def format_completion_as_markdown(completion):
+    """
+    Returns the Markdown of a project completion document, rendered by `render_completion_as_markdown` once
+    per content.
+
+    Parameters:
+    - completion (dict): A dictionary containing all the necessary data to format the completion document.
+
+    Returns:
+    - str: A string containing the formatted completion document in Markdown format.
+    """
+    key = document_key("completion", completion, COMPLETION_MARKDOWN_FIELDS)
+    return markdown_cache.get_or_load(key, lambda: render_completion_as_markdown(completion))
+
+def render_completion_as_markdown(completion):
     """
     Generates a Markdown representation of a project completion document.
 
@@ -159,35 +331,125 @@ def is_github_repo_valid(github_link):
     """
     Checks if the provided GitHub repository link is valid by making an API request.
 
-    This function verifies a GitHub repository URL by using GitHub's API to fetch the repository data. It checks
-    if the response status is 200, indicating that the repository exists and is accessible.
+    This function verifies a GitHub repository URL by using GitHub's API to fetch the repository data, see
+    `repo_validation.check_github_repo` for the caching and rate limit handling.
 
     Parameters:
     - github_link (str): The GitHub URL to be validated.
 
     Returns:
-    - bool: True if the repository is valid, False otherwise.
+    - bool: True if the repository is valid, False otherwise, including when it could not be checked.
     """
-    if not github_link.startswith("https://github.com/"):
-        return False
-    parts = github_link.split("/")
-    if len(parts) < 5:
-        return False
-    repo_owner, repo_name = parts[-2], parts[-1]
-    api_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}"
-    response = requests.get(api_url)
-    return response.status_code == 200
+    return check_github_repo(github_link)[0] == VALID
+
+
+# Files of the student repositories kept in the archives
+ARCHIVE_EXTENSIONS = ['.py', '.ipynb']
+ARCHIVE_FILES = ['README.md']
+# 'filtered' fetches only the latest commit and only the files kept in the archive (shallow partial clone with
+# a sparse checkout), 'full' runs a plain git clone with the whole history
+ARCHIVE_CLONE_MODE = os.getenv('ARCHIVE_CLONE_MODE', 'filtered')
+# Bytes of git objects a clone may download before it is aborted, 0 for no limit
+ARCHIVE_MAX_REPO_BYTES = int(os.getenv('ARCHIVE_MAX_REPO_BYTES', 500 * 1024 * 1024))
+# Seconds a git command of the archiving (clone, checkout, ls-remote) may run before it is killed
+ARCHIVE_GIT_TIMEOUT = float(os.getenv('ARCHIVE_GIT_TIMEOUT', 600))
+
+class RepoTooLargeError(RuntimeError):
+    """Raised when cloning a repository downloads more than the configured cap. Retrying it cannot help."""
+    retryable = False
+
+def directory_size(directory):
+    """Returns the total size in bytes of the files under a directory."""
+    total = 0
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # Temporary pack files come and go while git is running
+    return total
+
+def run_git(args, cwd=None, watch_dir=None, max_bytes=0, timeout=None):
+    """
+    Runs a git command, killing it as soon as `watch_dir` grows beyond `max_bytes` or after `timeout` seconds.
+    Git never prompts for credentials, a repository asking for them fails instead.
+
+    Parameters:
+    - args (list of str): The git arguments.
+    - cwd (str): The directory to run git in.
+    - watch_dir (str): The directory the command downloads into, usually the repository's .git.
+    - max_bytes (int): The cap on the size of `watch_dir`, 0 for none.
+    - timeout (float): Seconds the command may run, `ARCHIVE_GIT_TIMEOUT` by default.
+    """
+    deadline = time.monotonic() + (ARCHIVE_GIT_TIMEOUT if timeout is None else timeout)
+    # In its own process group, so that the helpers git starts (git-remote-https, ssh) are killed with it
+    process = subprocess.Popen(['git', *args], cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                               env=dict(os.environ, GIT_TERMINAL_PROMPT='0'), start_new_session=True)
+    finished = False
+    while not finished:
+        try:
+            stdout, stderr = process.communicate(timeout=0.5)
+            finished = True
+        except subprocess.TimeoutExpired:
+            if time.monotonic() > deadline:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.communicate()
+                raise RuntimeError(f"Git {args[0]} timed out.")
+        if max_bytes and watch_dir and directory_size(watch_dir) > max_bytes:
+            if not finished:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.communicate()
+            raise RepoTooLargeError(f"Repository is larger than the {max_bytes} bytes allowed for archiving.")
+    if process.returncode != 0:
+        print(f"git {args[0]} failed:", stderr)
+        raise RuntimeError(f"Git {args[0]} failed: {stderr}")
+    return stdout
+
+def clone_repo(git_url, destination_path, mode=None, include_extensions=None, include_files=None, max_bytes=None):
+    """
+    Clone the given repository URL into a specified directory.
 
+    In 'filtered' mode only the files matching `include_extensions` or `include_files` are downloaded and
+    checked out; servers that do not support partial clones send every blob of the latest commit instead.
 
-def clone_repo(git_url, destination_path):
-    """Clone the given repository URL into a specified directory."""
+    Parameters:
+    - git_url (str): The repository to clone.
+    - destination_path (str): The directory to clone into.
+    - mode (str): 'filtered' or 'full', `ARCHIVE_CLONE_MODE` by default.
+    - include_extensions (list of str): File extensions kept by a filtered clone.
+    - include_files (list of str): File names kept by a filtered clone.
+    - max_bytes (int): Download cap, `ARCHIVE_MAX_REPO_BYTES` by default.
+
+    Returns:
+    - dict: The clone mode, the cloned commit, clone_seconds and transferred_bytes (size of the downloaded git
+      objects).
+    """
+    mode = mode or ARCHIVE_CLONE_MODE
+    include_extensions = ARCHIVE_EXTENSIONS if include_extensions is None else include_extensions
+    include_files = ARCHIVE_FILES if include_files is None else include_files
+    max_bytes = ARCHIVE_MAX_REPO_BYTES if max_bytes is None else max_bytes
+    git_dir = os.path.join(destination_path, '.git')
     os.makedirs(destination_path, exist_ok=True)
-    try:
-        subprocess.run(['git', 'clone', git_url, destination_path], check=True, capture_output=True, text=True)
-        print("Repository cloned successfully into:", destination_path)
-    except subprocess.CalledProcessError as e:
-        print("Failed to clone repository:", e.stderr)
-        raise RuntimeError(f"Git clone failed: {e.stderr}")
+    start = time.perf_counter()
+    if mode == 'full':
+        run_git(['clone', git_url, destination_path], watch_dir=destination_path, max_bytes=max_bytes)
+    elif mode == 'filtered':
+        run_git(['clone', '--depth', '1', '--filter=blob:none', '--no-checkout', git_url, destination_path],
+                watch_dir=destination_path, max_bytes=max_bytes)
+        patterns = [f"*{extension}" for extension in include_extensions] + list(include_files)
+        run_git(['sparse-checkout', 'set', '--no-cone', *patterns], cwd=destination_path)
+        # Downloads the blobs of the sparse files only
+        run_git(['checkout'], cwd=destination_path, watch_dir=git_dir, max_bytes=max_bytes)
+    else:
+        raise ValueError(f"Unknown clone mode {mode!r}, expected 'filtered' or 'full'")
+    stats = {
+        'clone_mode': mode,
+        'commit': run_git(['rev-parse', 'HEAD'], cwd=destination_path).strip(),
+        'clone_seconds': round(time.perf_counter() - start, 3),
+        'transferred_bytes': directory_size(git_dir),
+    }
+    print("Repository cloned successfully into:", destination_path, stats)
+    return stats
 
 def make_files_writable(directory):
     """Recursively make all files in the directory writable."""
@@ -205,6 +467,10 @@ def compress_directory(source_dir, output_file, include_extensions=None, include
                     file_path = os.path.join(root, file)
                     tar.add(file_path, arcname=os.path.relpath(file_path, start=source_dir))
 
+# Where the repository archives are stored: a GCS bucket name, or file:///some/dir to write them to a local
+# directory instead (used to run the archiving without GCS credentials).
+ARCHIVE_BUCKET = os.getenv('ARCHIVE_BUCKET', 'projects-capstone')
+
 def upload_to_gcs(bucket_name, source_file_name, destination_blob_name):
     """Upload a file to Google Cloud Storage."""
     from google.cloud import storage
@@ -214,28 +480,135 @@ def upload_to_gcs(bucket_name, source_file_name, destination_blob_name):
     blob.upload_from_filename(source_file_name)
     print(f"File {source_file_name} uploaded to {destination_blob_name}.")
 
-def process_student_data(student_data):
-    """Process data for a single student to clone their repo, archive it, and upload to GCS."""
-    student_name = student_data['name']
-    repo_url = student_data['repo_url']
-    bucket_name = 'projects-capstone'
-    local_repo_dir = os.path.join('./temp', student_name)  # Local directory for the repo
-    compressed_file_path = os.path.join('./temp', f"{student_name}.tar.gz")
+# How repositories are stored: 'cas' uploads each distinct file once under its SHA-256 and writes a manifest
+# per submission (see archive_store.py), 'tarball' uploads a compressed tar of every submission
+ARCHIVE_FORMAT = os.getenv('ARCHIVE_FORMAT', 'cas')
+# Object written next to every archive, recording what was archived last (see archive_semester.py)
+ARCHIVE_RECORD_NAME = 'archive.json'
 
+# Parent directory of the per-job scratch directories, the system temp directory by default
+ARCHIVE_WORKSPACE_ROOT = os.getenv('ARCHIVE_WORKSPACE_ROOT') or None
+# Archive jobs allowed to clone and compress at the same time in this process
+ARCHIVE_MAX_CONCURRENT = int(os.getenv('ARCHIVE_MAX_CONCURRENT', 2))
+archive_slots = threading.BoundedSemaphore(ARCHIVE_MAX_CONCURRENT)
+
+# Size of the chunks sent by the resumable GCS upload, a multiple of 256 KiB. Bounds the memory used per archive.
+ARCHIVE_UPLOAD_CHUNK_BYTES = int(os.getenv('ARCHIVE_UPLOAD_CHUNK_BYTES', 8 * 1024 * 1024))
+
+class CountingWriter:
+    """Wraps a binary file object and counts the bytes written through it."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.fileobj.write(data)
+        self.bytes_written += len(data)
+        return len(data)
+
+@contextlib.contextmanager
+def open_archive_writer(bucket_name, destination_blob_name):
+    """
+    Opens a binary stream to an object of the archive bucket.
+
+    GCS objects are written with a chunked resumable upload, each chunk being retried on its own. Local
+    directories (file:// buckets) get a temporary file renamed into place. Either way the object only appears
+    once the block exits without error; a failed upload is abandoned instead of leaving a truncated archive.
+
+    Parameters:
+    - bucket_name (str): A GCS bucket name, or a file:// URL of a local directory.
+    - destination_blob_name (str): The object name.
+
+    Yields:
+    - file object: The binary stream to write the object to.
+    """
+    if bucket_name.startswith('file://'):
+        with atomic_file(local_path(bucket_name, destination_blob_name)) as file:
+            yield file
+    else:
+        from google.cloud.storage.retry import DEFAULT_RETRY
+        blob = storage.Client().bucket(bucket_name).blob(destination_blob_name)
+        writer = blob.open('wb', chunk_size=ARCHIVE_UPLOAD_CHUNK_BYTES, ignore_flush=True, retry=DEFAULT_RETRY)
+        yield writer
+        # Uploads the last chunk and finalizes the object, skipped when the archiving failed
+        writer.close()
+
+def stream_directory_archive(source_dir, fileobj, include_extensions=None, include_files=None, codec=None, level=None):
+    """
+    Writes selected files from a directory as a compressed tar stream, without an intermediate file.
+
+    Parameters:
+    - source_dir (str): The directory to archive. Its .git directory is skipped.
+    - fileobj (file object): The binary stream receiving the archive, see `open_archive_writer`.
+    - include_extensions (list of str): File extensions to archive.
+    - include_files (list of str): File names to archive.
+    - codec (str): The compression codec, see `archive_codecs.CODECS`.
+    - level (int): The compression level, the configured or codec default when None.
+
+    Returns:
+    - int: The size in bytes of the archive.
+    """
+    counter = CountingWriter(fileobj)
+    compressor = open_compressor(counter, codec, level)
+    # Closed even when the archiving fails, so that the compression threads are stopped
     try:
-        clone_repo(repo_url, local_repo_dir)
-        compress_directory(local_repo_dir, compressed_file_path, include_extensions=['.py', '.ipynb'], include_files=['README.md'])
-        gcs_blob_name = f"projects/{student_data['semester']}/{student_name}/repo.tar.gz"
-        upload_to_gcs(bucket_name, compressed_file_path, gcs_blob_name)
+        with tarfile.open(fileobj=compressor, mode='w|') as tar:
+            for relative_path in iter_archived_files(source_dir, include_extensions, include_files):
+                tar.add(os.path.join(source_dir, relative_path), arcname=relative_path)
     finally:
-        # Make files writable before deletion
-        make_files_writable(local_repo_dir)
-        shutil.rmtree(local_repo_dir, ignore_errors=True)
-        if os.path.exists(compressed_file_path):
-            os.remove(compressed_file_path)
-        # Optionally, remove the entire temp directory
-        if os.path.exists('./temp'):
-            make_files_writable('./temp')
-            shutil.rmtree('./temp', ignore_errors=True)
-        print(f"Cleaned up {local_repo_dir} and {compressed_file_path}")
+        compressor.close()
+    return counter.bytes_written
+
+def process_student_data(student_data, slots=None):
+    """
+    Process data for a single student to clone their repo, archive it, and upload to GCS.
+
+    With the 'cas' format only the files not already in the bucket are uploaded, next to a manifest listing
+    the snapshot. With the 'tarball' format the archive is streamed to the bucket while it is being
+    compressed, only the clone uses local disk.
+
+    Every call works in its own scratch directory that is removed when it returns, so jobs for different (or
+    identically named) students can run concurrently. At most `ARCHIVE_MAX_CONCURRENT` run at once, further
+    calls wait for a free slot.
+
+    Parameters:
+    - student_data (dict): The student's name, semester and repo_url, and optionally the bucket to archive to.
+    - slots (Semaphore): Caps the archives running at once, `archive_slots` by default. Callers running their
+      own pool of archives, e.g. archive_semester.py, pass a semaphore sized for it.
+
+    Returns:
+    - dict: The bucket, the manifest or archive name and the upload statistics, with the clone statistics.
+    """
+    student_name = student_data['name']
+    repo_url = student_data['repo_url']
+    bucket_name = student_data.get('bucket', ARCHIVE_BUCKET)
+
+    with slots or archive_slots:
+        workspace = tempfile.mkdtemp(prefix='archive-', dir=ARCHIVE_WORKSPACE_ROOT)
+        local_repo_dir = os.path.join(workspace, 'repo')  # Local directory for the repo
+        try:
+            clone_stats = clone_repo(repo_url, local_repo_dir)
+            project_prefix = f"projects/{student_data['semester']}/{student_name}"
+            if ARCHIVE_FORMAT == 'cas':
+                store_stats = store_snapshot(bucket_name, local_repo_dir, project_prefix, ARCHIVE_EXTENSIONS, ARCHIVE_FILES,
+                                             metadata={'repo_url': repo_url, 'name': student_name, 'semester': student_data['semester']})
+                print(f"Snapshot of {repo_url} stored as {store_stats['manifest']} ({store_stats['uploaded_objects']} "
+                      f"of {store_stats['files']} files uploaded, {store_stats['uploaded_bytes']} bytes).")
+            else:
+                gcs_blob_name = f"{project_prefix}/repo.{archive_extension()}"
+                with open_archive_writer(bucket_name, gcs_blob_name) as archive:
+                    archive_bytes = stream_directory_archive(local_repo_dir, archive, include_extensions=ARCHIVE_EXTENSIONS, include_files=ARCHIVE_FILES)
+                store_stats = {'blob': gcs_blob_name, 'archive_bytes': archive_bytes}
+                print(f"Archive of {repo_url} uploaded to {gcs_blob_name} ({archive_bytes} bytes).")
+            record = dict(store_stats, repo_url=repo_url, commit=clone_stats['commit'], format=ARCHIVE_FORMAT,
+                          archived_at=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+            write_object(bucket_name, f"{project_prefix}/{ARCHIVE_RECORD_NAME}", json.dumps(record, indent=1).encode(),
+                         content_type='application/json')
+        finally:
+            # Make files writable before deletion, only this job's workspace is removed
+            make_files_writable(workspace)
+            shutil.rmtree(workspace, ignore_errors=True)
+            print(f"Cleaned up {workspace}")
+    return dict(clone_stats, bucket=bucket_name, **store_stats)
 
@@ -0,0 +1,126 @@
+import json
+import subprocess
+import time
+
+import pytest
+
+import archive_jobs
+import utils
+from archive_jobs import claim_job, enqueue_job, get_job, requeue_stale_jobs, run_next_job
+
+
+def git(*args, cwd=None):
+    subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', *args], cwd=cwd, check=True,
+                   capture_output=True)
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive_jobs, 'ARCHIVE_JOBS_DB', str(tmp_path / 'archive_jobs.sqlite3'))
+    monkeypatch.setattr(archive_jobs, 'ARCHIVE_JOB_RETRY_DELAY', 0)
+    monkeypatch.setattr(utils, 'ARCHIVE_BUCKET', f"file://{tmp_path / 'bucket'}")
+    return tmp_path
+
+
+@pytest.fixture
+def bare_repo(tmp_path):
+    remote = tmp_path / 'remote.git'
+    work = tmp_path / 'work'
+    git('init', '--bare', str(remote))
+    git('clone', str(remote), str(work))
+    (work / 'README.md').write_text('# Capstone\n')
+    (work / 'model.py').write_text('print("model")\n')
+    (work / 'data.csv').write_text('a,b\n')
+    git('add', '.', cwd=work)
+    git('commit', '-m', 'Initial commit', cwd=work)
+    git('push', 'origin', 'HEAD', cwd=work)
+    return f"file://{remote}"
+
+
+def test_job_archives_repository(queue, bare_repo):
+    job_id = enqueue_job({'name': 'student', 'semester': 'Fall 2024', 'repo_url': bare_repo}, proposal_id='p1')
+    assert get_job(job_id)['status'] == 'queued'
+
+    assert run_next_job()
+    assert not run_next_job()
+
+    job = archive_jobs.latest_job_for_proposal('p1')
+    assert job['job_id'] == job_id
+    assert job['status'] == 'done'
+    assert job['attempts'] == 1
+    record = queue / 'bucket' / 'projects' / 'Fall 2024' / 'student' / utils.ARCHIVE_RECORD_NAME
+    assert json.loads(record.read_text())['commit'] == job['result']['commit']
+
+
+def test_failing_job_is_retried_then_failed(queue):
+    calls = []
+
+    def handler(payload):
+        calls.append(payload)
+        raise RuntimeError('clone failed')
+
+    job_id = enqueue_job({'name': 'student'}, max_attempts=3)
+    for attempt in range(1, 3):
+        assert run_next_job(handler)
+        job = get_job(job_id)
+        assert job['status'] == 'queued'
+        assert job['attempts'] == attempt
+        assert 'clone failed' in job['error']
+
+    assert run_next_job(handler)
+    assert get_job(job_id)['status'] == 'failed'
+    assert not run_next_job(handler)
+    assert len(calls) == 3
+
+
+def test_failing_job_backs_off(queue, monkeypatch):
+    monkeypatch.setattr(archive_jobs, 'ARCHIVE_JOB_RETRY_DELAY', 60)
+
+    def handler(payload):
+        raise RuntimeError('clone failed')
+
+    job_id = enqueue_job({'name': 'student'}, max_attempts=3)
+    assert run_next_job(handler)
+    job = get_job(job_id)
+    assert job['next_attempt_at'] - job['updated_at'] == pytest.approx(60)
+    assert not run_next_job(handler)
+
+
+def test_non_retryable_error_fails_at_once(queue):
+    def handler(payload):
+        raise utils.RepoTooLargeError('too large')
+
+    job_id = enqueue_job({'name': 'student'}, max_attempts=3)
+    assert run_next_job(handler)
+    assert get_job(job_id)['status'] == 'failed'
+
+
+def test_expired_lease_is_requeued(queue, monkeypatch):
+    job_id = enqueue_job({'name': 'student'})
+    job = claim_job()
+    assert job['job_id'] == job_id
+    assert requeue_stale_jobs() == 0
+    assert archive_jobs.renew_lease(job)
+
+    monkeypatch.setattr(archive_jobs, 'ARCHIVE_JOB_LEASE_SECONDS', -1)
+    assert requeue_stale_jobs() == 1
+    assert get_job(job_id)['status'] == 'queued'
+    # The worker that lost the lease can no longer renew it
+    assert not archive_jobs.renew_lease(job)
+    assert claim_job()['attempts'] == 2
+
+
+def test_lease_is_renewed_while_the_handler_runs(queue, monkeypatch):
+    monkeypatch.setattr(archive_jobs, 'ARCHIVE_JOB_HEARTBEAT_SECONDS', 0.05)
+    job_id = enqueue_job({'name': 'student'})
+    updates = []
+
+    def handler(payload):
+        claimed_at = get_job(job_id)['updated_at']
+        time.sleep(0.3)
+        updates.append(get_job(job_id)['updated_at'] - claimed_at)
+        return {}
+
+    assert run_next_job(handler)
+    assert updates[0] > 0
+    assert get_job(job_id)['status'] == 'done'
@@ -0,0 +1,85 @@
+import gzip
+import io
+import tarfile
+
+import pytest
+
+import utils
+from archive_codecs import CODECS, open_compressor
+from utils import open_archive_writer, stream_directory_archive
+
+
+def make_repo(directory):
+    files = {
+        'README.md': b'# Capstone\n',
+        'notebooks/analysis.ipynb': b'{"cells": []}\n' * 2000,
+        'src/model.py': b'print("model")\n' * 100000,
+        'requirements.txt': b'pandas\n',
+    }
+    skipped = {
+        'data/raw.bin': b'\x00' * 1024,
+        '.git/config': b'[core]\n',
+    }
+    for name, content in {**files, **skipped}.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+    return files
+
+
+def decompress(codec, data):
+    if codec == 'zstd':
+        zstandard = pytest.importorskip('zstandard')
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read()
+    return gzip.decompress(data)
+
+
+@pytest.mark.parametrize('codec', sorted(CODECS))
+def test_stream_directory_archive_round_trip(tmp_path, codec):
+    if codec == 'zstd':
+        pytest.importorskip('zstandard')
+    files = make_repo(tmp_path / 'repo')
+    bucket = tmp_path / 'bucket'
+
+    with open_archive_writer(f'file://{bucket}', f'archives/repo.{CODECS[codec][0]}') as fileobj:
+        size = stream_directory_archive(str(tmp_path / 'repo'), fileobj, ['.md', '.ipynb', '.py'], ['requirements.txt'], codec=codec)
+
+    archive = bucket / 'archives' / f'repo.{CODECS[codec][0]}'
+    assert archive.stat().st_size == size
+    assert list(archive.parent.iterdir()) == [archive]
+    with tarfile.open(fileobj=io.BytesIO(decompress(codec, archive.read_bytes()))) as tar:
+        assert sorted(tar.getnames()) == sorted(files)
+        for name, content in files.items():
+            assert tar.extractfile(name).read() == content
+
+
+@pytest.mark.parametrize('codec', sorted(CODECS))
+def test_failed_archive_is_abandoned(tmp_path, monkeypatch, codec):
+    if codec == 'zstd':
+        pytest.importorskip('zstandard')
+    make_repo(tmp_path / 'repo')
+    bucket = tmp_path / 'bucket'
+
+    def failing_files(source_dir, include_extensions, include_files):
+        yield 'README.md'
+        raise OSError('clone vanished')
+
+    compressors = []
+
+    def tracked_compressor(*args, **kwargs):
+        compressors.append(open_compressor(*args, **kwargs))
+        return compressors[-1]
+
+    monkeypatch.setattr(utils, 'iter_archived_files', failing_files)
+    monkeypatch.setattr(utils, 'open_compressor', tracked_compressor)
+    with pytest.raises(OSError, match='clone vanished'):
+        with open_archive_writer(f'file://{bucket}', 'archives/repo.tar') as fileobj:
+            stream_directory_archive(str(tmp_path / 'repo'), fileobj, ['.md'], [], codec=codec)
+
+    assert list((bucket / 'archives').iterdir()) == []
+    # The compressor was closed, which stops the compression threads of 'pgzip' and 'zstd'
+    assert len(compressors) == 1
+    if codec == 'pgzip':
+        assert compressors[0]._executor._shutdown
+    else:
+        assert compressors[0].closed
@@ -0,0 +1,37 @@
+import time
+
+from caching import ResultCache
+
+
+def test_expired_entries_drop_their_tags():
+    cache = ResultCache(max_bytes=1024, ttl=0.05)
+    cache.get_or_load('a', lambda: b'x', tags=('proposals', 'proposal:1'))
+    time.sleep(0.1)
+
+    cache.get_or_load('b', lambda: b'y', tags=('proposals',))
+
+    assert cache._key_tags == {'b': ('proposals',)}
+    assert cache._tags == {'proposals': {'b'}}
+    assert cache.stats()['expirations'] == 1
+    assert cache.stats()['evictions'] == 0
+
+
+def test_expired_entry_is_reloaded_with_its_tags():
+    cache = ResultCache(max_bytes=1024, ttl=0.05)
+    cache.get_or_load('a', lambda: b'x', tags=('proposal:1',))
+    time.sleep(0.1)
+
+    assert cache.get_or_load('a', lambda: b'z', tags=('proposal:1',)) == b'z'
+    cache.invalidate('proposal:1')
+
+    assert cache.get_or_load('a', lambda: b'w') == b'w'
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_evictions_drop_their_tags():
+    cache = ResultCache(max_bytes=4)
+    cache.get_or_load('a', lambda: b'xxx', tags=('proposal:1',))
+    cache.get_or_load('b', lambda: b'yyy', tags=('proposal:2',))
+
+    assert cache._tags == {'proposal:2': {'b'}}
+    assert cache.stats()['evictions'] == 1
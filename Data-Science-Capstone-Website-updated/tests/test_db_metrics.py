@@ -0,0 +1,55 @@
+import pytest
+import sqlalchemy
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+import db_metrics
+from db_metrics import InstrumentedQueuePool, PoolMetrics, instrument_pool
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = PoolMetrics()
+    monkeypatch.setattr(db_metrics, 'pool_metrics', metrics)
+    return metrics
+
+
+@pytest.fixture
+def engine(tmp_path, metrics):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'pool.sqlite3'}", poolclass=InstrumentedQueuePool,
+                                      pool_size=2, max_overflow=0, pool_timeout=0.2)
+    instrument_pool(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_checkouts_are_recorded(engine, metrics):
+    with engine.connect() as first, engine.connect() as second:
+        first.execute(text("SELECT 1"))
+        second.execute(text("SELECT 1"))
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    stats = metrics.stats(engine.pool)
+    assert stats['checkouts'] == 3
+    assert stats['peak_checked_out'] == 2
+    assert stats['checked_out'] == 0
+    assert stats['pool_size'] == 2
+    assert stats['max_overflow'] == 0
+    assert stats['max_checkout_wait_seconds'] > 0
+
+
+def test_checkout_timeouts_are_recorded(engine, metrics):
+    with engine.connect(), engine.connect():
+        assert metrics.stats(engine.pool)['saturation'] == 1.0
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    assert metrics.stats(engine.pool)['checkout_timeouts'] == 1
+
+
+def test_invalidations_are_recorded(engine, metrics):
+    with engine.connect() as connection:
+        connection.invalidate()
+
+    assert metrics.stats(engine.pool)['invalidations'] == 1
@@ -0,0 +1,46 @@
+import pytest
+import sqlalchemy
+from sqlalchemy import event, text
+
+import migrations
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    engine = sqlalchemy.create_engine('sqlite://')
+
+    @event.listens_for(engine, 'connect')
+    def add_functions(dbapi_connection, record):
+        dbapi_connection.create_function('CHAR_LENGTH', 1, lambda value: None if value is None else len(value))
+
+    # SQLite has neither information_schema nor ALTER TABLE ... ADD PRIMARY KEY
+    monkeypatch.setattr(migrations, 'index_exists', lambda connection, table, index: False)
+    with engine.connect() as connection:
+        connection.execute(text("CREATE TABLE student_infos (proposal_id TEXT, name TEXT)"))
+        yield connection
+
+
+def insert(connection, *proposal_ids):
+    connection.execute(text("INSERT INTO student_infos (proposal_id) VALUES (:proposal_id)"),
+                       [{'proposal_id': proposal_id} for proposal_id in proposal_ids])
+
+
+def test_valid_ids_pass(connection):
+    insert(connection, 'a', 'b')
+    assert migrations.find_invalid_proposal_ids(connection) == []
+
+
+def test_invalid_ids_stop_the_migration(connection):
+    statements = []
+    insert(connection, 'a', 'b', 'b', 'b', None, 'x' * 65)
+    event.listen(connection, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+
+    with pytest.raises(RuntimeError) as error:
+        migrations.add_primary_key(connection)
+
+    message = str(error.value)
+    assert "'b' is used by 3 rows" in message
+    assert "1 rows have no proposal_id" in message
+    assert "longer than 64 characters" in message
+    assert "'a'" not in message
+    assert not [statement for statement in statements if statement.startswith('ALTER')]
@@ -0,0 +1,128 @@
+import http.server
+import socket
+import threading
+
+import pytest
+
+import repo_validation
+from repo_validation import INVALID, UNKNOWN, VALID, check_with_api
+
+
+class StubGitHub(http.server.ThreadingHTTPServer):
+    """Answers GET /repos/<owner>/<repo> with the queued (status, headers) responses and records the requests."""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.responses = {}
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        status, headers = self.server.responses[self.path].pop(0)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        body = b'{}' if status == 200 else b''
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def github(monkeypatch):
+    server = StubGitHub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(repo_validation, 'GITHUB_API_URL', server.url)
+    repo_validation.clear_cache()
+    yield server
+    server.shutdown()
+    server.server_close()
+    repo_validation.clear_cache()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(repo_validation.time, 'time', clock.time)
+    return clock
+
+
+def test_revalidates_with_etag(github, clock):
+    github.responses['/repos/owner/repo'] = [(200, {'ETag': '"v1"'}), (304, {'ETag': '"v1"'})]
+
+    assert check_with_api('owner', 'repo')[0] == VALID
+    assert check_with_api('owner', 'repo')[0] == VALID
+    assert len(github.requests) == 1
+
+    clock.now += repo_validation.REPO_VALID_TTL + 1
+    assert check_with_api('owner', 'repo')[0] == VALID
+    assert len(github.requests) == 2
+    assert github.requests[1][1]['If-None-Match'] == '"v1"'
+
+    # The 304 renewed the entry
+    assert check_with_api('owner', 'repo')[0] == VALID
+    assert len(github.requests) == 2
+
+
+def test_caches_missing_repository(github, clock):
+    github.responses['/repos/owner/missing'] = [(404, {}), (404, {})]
+
+    assert check_with_api('owner', 'missing')[0] == INVALID
+    clock.now += repo_validation.REPO_INVALID_TTL - 1
+    assert check_with_api('owner', 'missing')[0] == INVALID
+    assert len(github.requests) == 1
+
+    clock.now += 2
+    assert check_with_api('owner', 'missing')[0] == INVALID
+    assert len(github.requests) == 2
+    assert 'If-None-Match' not in github.requests[1][1]
+
+
+def test_blocks_until_rate_limit_resets(github, clock):
+    reset = int(clock.now) + 600
+    github.responses['/repos/owner/first'] = [(403, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset)})]
+    github.responses['/repos/owner/second'] = [(200, {})]
+
+    assert check_with_api('owner', 'first')[0] == UNKNOWN
+    clock.now = reset - 1
+    status, message = check_with_api('owner', 'second')
+    assert status == UNKNOWN
+    assert 'rate limit' in message
+    assert len(github.requests) == 1
+
+    clock.now = reset
+    assert check_with_api('owner', 'second')[0] == VALID
+    assert len(github.requests) == 2
+
+
+def test_falls_back_to_stale_entry(github, clock, monkeypatch):
+    github.responses['/repos/owner/repo'] = [(200, {'ETag': '"v1"'})]
+    assert check_with_api('owner', 'repo')[0] == VALID
+
+    # Nothing listens on the port of a closed socket
+    with socket.socket() as closed:
+        closed.bind(('127.0.0.1', 0))
+        port = closed.getsockname()[1]
+    monkeypatch.setattr(repo_validation, 'GITHUB_API_URL', f"http://127.0.0.1:{port}")
+    clock.now += repo_validation.REPO_VALID_TTL + 1
+    assert check_with_api('owner', 'repo')[0] == VALID
+    assert check_with_api('owner', 'other')[0] == UNKNOWN
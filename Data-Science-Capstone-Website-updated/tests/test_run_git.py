@@ -0,0 +1,17 @@
+import time
+
+import pytest
+
+from utils import run_git
+
+
+def test_git_is_killed_after_timeout():
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match='timed out'):
+        # The alias runs in a child process of git, which must be killed too
+        run_git(['-c', 'alias.hang=!sleep 30', 'hang'], timeout=0.5)
+    assert time.monotonic() - start < 5
+
+
+def test_git_output_is_returned():
+    assert run_git(['--version']).startswith('git version')
@@ -0,0 +1,52 @@
+import io
+
+import pytest
+from PIL import Image
+
+import utils
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'STATIC_DIR', str(tmp_path))
+    monkeypatch.setattr(utils, 'static_serving_enabled', lambda: True)
+    utils.markdown_cache.clear()
+    yield tmp_path / utils.STATIC_IMAGES_DIR
+    utils.markdown_cache.clear()
+
+
+def make_proposal():
+    image = io.BytesIO()
+    Image.new('RGB', (40, 30), 'red').save(image, format='PNG')
+    proposal = dict.fromkeys(utils.PROPOSAL_MARKDOWN_FIELDS, 'text')
+    proposal.update(proposal_id='p1', objective_image=image.getvalue(), dataset_image=None, possible_issues_image=None,
+                    objective_image_thumbnail=None, dataset_image_thumbnail=None, possible_issues_image_thumbnail=None)
+    return proposal
+
+
+def test_proposal_images_are_published(static_dir):
+    markdown = utils.format_proposal_as_markdown(make_proposal())
+
+    names = utils.STATIC_IMAGE_URL.findall(markdown)
+    assert len(names) == 1
+    assert (static_dir / names[0]).exists()
+    assert 'base64' not in markdown
+
+
+def test_removed_image_is_published_again(static_dir):
+    proposal = make_proposal()
+    markdown = utils.format_proposal_as_markdown(proposal)
+    (name,) = utils.STATIC_IMAGE_URL.findall(markdown)
+    (static_dir / name).unlink()
+
+    assert utils.format_proposal_as_markdown(proposal) == markdown
+    assert (static_dir / name).exists()
+
+
+def test_unsaved_proposal_is_rendered_inline(static_dir):
+    proposal = dict(make_proposal(), proposal_id=None)
+    markdown = utils.format_proposal_as_markdown(proposal)
+
+    assert 'data:image/jpeg;base64,' in markdown
+    assert not static_dir.exists()
+    assert utils.markdown_cache.stats()['entries'] == 0